@@ -0,0 +1,257 @@
+# batch_env.py - Vectorized batch of single-player Tetris boards
+#
+# Simulates N games at once with NumPy. The rules match engine.TetrisEngine
+# (and therefore single_player.py): the engine's own rotation tables, spawn
+# position, scoring, levels and LEVEL_SPEED gravity. Each board draws its
+# pieces from pieces.piece_stream (the stream behind PieceQueue), so board i
+# of BatchEnv(n, seed) plays the same game as TetrisEngine(seed + i) given the
+# same actions. All boards live
+# in one (N, height, width) uint8 array and every step is applied to the
+# whole batch with array operations.
+#
+# Usage: python batch_env.py [--boards N] [--steps S]
+
+import argparse
+import time
+from itertools import islice
+
+import numpy as np
+
+from engine import (SHAPES, GRID_WIDTH, GRID_HEIGHT, LEVEL_SPEED, ROTATIONS, PIECE_CELLS,
+                    NOOP, LEFT, RIGHT, DOWN, ROTATE, DROP, ACTIONS)
+from pieces import piece_stream, new_seed
+
+NUM_KINDS = len(SHAPES)
+NUM_ROTATIONS = 4
+
+# (kind, rotation, cell, (dy, dx)), straight from the engine's rotation tables
+PIECE_OFFSETS = np.array(PIECE_CELLS, dtype=np.int64)
+# Width of each kind's spawn orientation (the engine centres it on spawn)
+SPAWN_WIDTHS = np.array([len(rotations[0][0]) for rotations in ROTATIONS], dtype=np.int64)
+# Pieces drawn ahead from each board's queue, so spawning stays vectorized
+PIECE_BUFFER = 8
+SPEEDS = np.array(LEVEL_SPEED, dtype=np.int64)
+
+
+class BatchEnv:
+    """
+    N independent single-player games stepped together.
+
+    State is held in arrays of length N (`kind`, `rotation`, `x`, `y`,
+    `next_kind`, `score`, `level`, `lines`, `pieces`, `drop_timer`, `done`)
+    plus `boards`, an (N, height, width) uint8 array of color_index + 1 values.
+    Finished games are frozen until `reset_done` restarts them.
+    """
+
+    def __init__(self, num_boards, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT, piece_mode="uniform"):
+        self.num_boards = num_boards
+        self.width = width
+        self.height = height
+        self.piece_mode = piece_mode
+        self.spawn_x = width // 2 - SPAWN_WIDTHS // 2
+        self.reset(seed)
+
+    def new_games(self, idx):
+        """Give each board in idx a fresh seed and piece stream"""
+        for i in idx:
+            self.seeds[i] = self.next_seed
+            self.streams[i] = piece_stream(self.next_seed, self.piece_mode)
+            self.next_seed += 1
+            self.upcoming[i] = np.fromiter(islice(self.streams[i], PIECE_BUFFER), np.int64, PIECE_BUFFER)
+            self.cursor[i] = 0
+            self.next_kind[i] = self.upcoming[i, 0]
+
+    def _refill(self, idx):
+        """Move the unplayed pieces to the front of `upcoming` and top it up from the streams"""
+        for i in idx:
+            keep = PIECE_BUFFER - self.cursor[i]
+            self.upcoming[i, :keep] = self.upcoming[i, self.cursor[i]:]
+            self.upcoming[i, keep:] = np.fromiter(islice(self.streams[i], PIECE_BUFFER - keep), np.int64)
+            self.cursor[i] = 0
+
+    def reset(self, seed=None):
+        """Start a new game on every board; board i gets seed `seed + i`"""
+        n = self.num_boards
+        self.next_seed = new_seed() if seed is None else seed
+        self.seeds = np.zeros(n, dtype=np.int64)  # Seed of the game on each board
+        self.streams = [None] * n
+        self.upcoming = np.zeros((n, PIECE_BUFFER), dtype=np.int64)  # Pieces still to come, per board
+        self.cursor = np.zeros(n, dtype=np.int64)  # Index of next_kind in `upcoming`
+        self.boards = np.zeros((n, self.height, self.width), dtype=np.uint8)
+        self.kind = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.next_kind = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.pieces = np.zeros(n, dtype=np.int64)
+        self.drop_timer = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        self.new_games(range(n))
+        self._spawn(np.arange(n))
+        return self
+
+    def reset_done(self):
+        """Restart every finished game, keeping the others running"""
+        idx = np.flatnonzero(self.done)
+        if idx.size == 0:
+            return idx
+        self.boards[idx] = 0
+        self.new_games(idx)
+        for name in ("score", "lines", "pieces", "drop_timer"):
+            getattr(self, name)[idx] = 0
+        self.level[idx] = 1
+        self.done[idx] = False
+        self._spawn(idx)
+        return idx
+
+    # --- Vectorized rules, each applied to the boards listed in `idx` ---
+
+    def _fits(self, idx, rotation, x, y):
+        """True where the piece of each board in idx fits at (rotation, x, y)"""
+        offsets = PIECE_OFFSETS[self.kind[idx], rotation]  # (M, 4, 2)
+        rows = y[:, None] + offsets[:, :, 0]
+        cols = x[:, None] + offsets[:, :, 1]
+        inside = (cols >= 0) & (cols < self.width) & (rows < self.height)
+        occupied = self.boards[idx[:, None],
+                               np.clip(rows, 0, self.height - 1),
+                               np.clip(cols, 0, self.width - 1)] != 0
+        # Cells above the top edge never collide (same as the engine)
+        return np.all(inside & ((rows < 0) | ~occupied), axis=1)
+
+    def _spawn(self, idx):
+        """Promote next_kind to the current piece; boards that cannot spawn are done"""
+        self._refill(idx[self.cursor[idx] + 1 >= PIECE_BUFFER])
+        self.kind[idx] = self.upcoming[idx, self.cursor[idx]]
+        self.cursor[idx] += 1
+        self.next_kind[idx] = self.upcoming[idx, self.cursor[idx]]
+        self.rotation[idx] = 0
+        self.x[idx] = self.spawn_x[self.kind[idx]]
+        self.y[idx] = 0
+        self.pieces[idx] += 1
+        blocked = ~self._fits(idx, self.rotation[idx], self.x[idx], self.y[idx])
+        self.done[idx[blocked]] = True
+
+    def _lock(self, idx):
+        """Merge pieces, clear full lines, score them and spawn the next pieces"""
+        if idx.size == 0:
+            return
+        offsets = PIECE_OFFSETS[self.kind[idx], self.rotation[idx]]
+        rows = self.y[idx, None] + offsets[:, :, 0]
+        cols = self.x[idx, None] + offsets[:, :, 1]
+        board_idx = np.broadcast_to(idx[:, None], rows.shape)
+        visible = rows >= 0
+        self.boards[board_idx[visible], rows[visible], cols[visible]] = \
+            np.broadcast_to((self.kind[idx] + 1)[:, None], rows.shape)[visible]
+
+        full = np.all(self.boards[idx] != 0, axis=2)  # (M, height)
+        cleared = full.sum(axis=1)
+        hit = cleared > 0
+        if hit.any():
+            clear_idx = idx[hit]
+            clear_full = full[hit]
+            counts = cleared[hit]
+            # Stable sort puts full rows first and keeps the others in order
+            # at the bottom; the full rows at the top are then emptied.
+            order = np.argsort(~clear_full, axis=1, kind="stable")
+            compacted = np.take_along_axis(self.boards[clear_idx], order[:, :, None], axis=1)
+            compacted[np.arange(self.height)[None, :] < counts[:, None]] = 0
+            self.boards[clear_idx] = compacted
+
+            self.score[clear_idx] += counts * counts * 100 * self.level[clear_idx]
+            self.lines[clear_idx] += counts
+            self.level[clear_idx] = np.minimum(10, self.lines[clear_idx] // 10 + 1)
+
+        self._spawn(idx)
+
+    def _move_down(self, idx):
+        """Move pieces down one row; lock those that cannot. Returns the moved mask"""
+        can_move = self._fits(idx, self.rotation[idx], self.x[idx], self.y[idx] + 1)
+        self.y[idx[can_move]] += 1
+        self._lock(idx[~can_move])
+        return can_move
+
+    def _shift(self, idx, dx):
+        fits = self._fits(idx, self.rotation[idx], self.x[idx] + dx, self.y[idx])
+        self.x[idx[fits]] += dx
+
+    def _rotate(self, idx):
+        rotation = (self.rotation[idx] + 1) % NUM_ROTATIONS
+        fits = self._fits(idx, rotation, self.x[idx], self.y[idx])
+        self.rotation[idx[fits]] = rotation[fits]
+
+    def _hard_drop(self, idx):
+        falling = idx
+        while falling.size:
+            can_move = self._fits(falling, self.rotation[falling], self.x[falling], self.y[falling] + 1)
+            moving = falling[can_move]
+            self.y[moving] += 1
+            self.score[moving] += 2
+            falling = moving
+        self._lock(idx)
+
+    def step(self, actions, dt=0):
+        """
+        Apply one action per board (see engine.ACTIONS), then advance gravity
+        by `dt` ms. Returns (reward, done) arrays; reward is the score gained.
+        """
+        actions = np.asarray(actions)
+        score_before = self.score.copy()
+        live = ~self.done
+
+        for action in (LEFT, RIGHT, ROTATE, DOWN, DROP):
+            idx = np.flatnonzero(live & (actions == action))
+            if idx.size == 0:
+                continue
+            if action == LEFT:
+                self._shift(idx, -1)
+            elif action == RIGHT:
+                self._shift(idx, 1)
+            elif action == ROTATE:
+                self._rotate(idx)
+            elif action == DOWN:
+                moved = self._move_down(idx)
+                self.score[idx[moved]] += 1
+            else:
+                self._hard_drop(idx)
+
+        if dt:
+            self.drop_timer[~self.done] += dt
+            while True:
+                speed = SPEEDS[np.minimum(9, self.level - 1)]
+                idx = np.flatnonzero(~self.done & (self.drop_timer >= speed))
+                if idx.size == 0:
+                    break
+                self.drop_timer[idx] -= speed[idx]
+                self._move_down(idx)
+
+        return self.score - score_before, self.done.copy()
+
+
+def benchmark(num_boards=4096, steps=500, dt=16, seed=0):
+    """Run random actions on a batch and return boards·steps per second"""
+    env = BatchEnv(num_boards, seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.choice(np.array(ACTIONS), size=(steps, num_boards))
+    start = time.perf_counter()
+    for t in range(steps):
+        env.step(actions[t], dt)
+        env.reset_done()
+    elapsed = time.perf_counter() - start
+    return num_boards * steps / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized batch environment")
+    parser.add_argument("--boards", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--dt", type=int, default=16, help="ms of gravity per step")
+    args = parser.parse_args()
+    rate = benchmark(args.boards, args.steps, args.dt)
+    print(f"{args.boards} boards x {args.steps} steps: {rate:,.0f} boards·steps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# bench_render.py - Time the draw paths headlessly with SDL's dummy drivers
+#
+# Usage: python benchmarks/bench_render.py [--iterations N] [--filter TEXT]
+#                                           [--save [PATH]] [--compare [PATH]]
+#
+# Every case draws a scripted board state (empty to nearly full) thousands
+# of times through the same per-frame path the game loops use
+# (render_playfield / render_game_field on a DirtyPlayfield): an idle frame
+# where nothing moved, a frame where the piece shifted one column, and a
+# full repaint. It reports the mean frame rate and latency percentiles. --save
+# writes the results as a JSON baseline; --compare reruns the cases and flags
+# any whose median got more than --threshold slower than the baseline (the
+# exit status is 1 if one did).
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+import main as menu  # Initializes pygame and the display like the game does
+from single_player import SinglePlayerGame
+from multiplayer import MultiplayerPlayer
+from particles import ParticleField, ParticleList, np
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_baseline.json")
+
+# Filled rows in the scripted boards (of 20): empty, half, nearly full
+FILL_LEVELS = (0, 10, 18)
+PARTICLES = 50
+MANY_PARTICLES = 2000
+
+
+def fill_rows(rows, filled, rng, colors=7):
+    """Fill the bottom `filled` rows with random colors, leaving one gap per row"""
+    num_rows, num_cols = len(rows), len(rows[0])
+    for row in range(num_rows - filled, num_rows):
+        gap = rng.randrange(num_cols)
+        rows[row] = [0 if col == gap else rng.randint(1, colors) for col in range(num_cols)]
+
+
+def single_player_game(filled):
+    game = SinglePlayerGame(seed=1)
+    fill_rows(game.engine.grid, filled, random.Random(filled))
+    game.engine.metrics.rebuild(game.engine.grid)
+    return game
+
+
+def multiplayer_player(filled):
+    player = MultiplayerPlayer(1, seed=1)
+    fill_rows(player.grid.grid, filled, random.Random(filled))
+    player.grid.metrics.rebuild(player.grid.grid)
+    return player
+
+
+def single_player_cases(screen, filled):
+    game = single_player_game(filled)
+    render = lambda: game.render_playfield(screen, 40, 40)
+    render()  # First frame is a full repaint; later idle frames find nothing to draw
+    shift = [1]
+
+    def moving():
+        # Shift the piece back and forth so every frame repaints its old and new cells
+        if not game.engine.move(shift[0]):
+            shift[0] = -shift[0]
+        render()
+
+    def full():
+        game.playfield.invalidate()
+        render()
+    return [(f"single.render_playfield.idle[{filled}]", render),
+            (f"single.render_playfield.moving[{filled}]", moving),
+            (f"single.render_playfield.full[{filled}]", full)]
+
+
+def multiplayer_cases(screen, filled):
+    player = multiplayer_player(filled)
+    render = lambda: player.render_game_field(screen, 40, 70)
+    render()
+    shift = [1]
+
+    def moving():
+        if not player.current_block.move(0, shift[0], player.grid):
+            shift[0] = -shift[0]
+        render()
+
+    def full():
+        player.playfield.invalidate()
+        render()
+    return [(f"multi.render_game_field.idle[{filled}]", render),
+            (f"multi.render_game_field.moving[{filled}]", moving),
+            (f"multi.render_game_field.full[{filled}]", full)]
+
+
+def make_cases(screen):
+    """(name, callable drawing one frame) for every benchmark case"""
+    cases = []
+    for filled in FILL_LEVELS:
+        cases += single_player_cases(screen, filled)
+        cases += multiplayer_cases(screen, filled)
+
+    game = single_player_game(0)
+    cases.append(("single.draw_info", lambda: game.draw_info(screen, 370, 40)))
+
+    def particle_frame(particles):
+        def draw():
+            screen.fill(menu.GRAY)
+            particles.update()
+            particles.draw(screen)
+        return draw
+
+    # The menu's own field (vectorized when NumPy is installed), the object
+    # fallback, and a field far larger than the menu uses
+    size = (menu.SCREEN_WIDTH, menu.SCREEN_HEIGHT)
+    cases.append(("menu.particles", particle_frame(menu.make_particles(PARTICLES, *size))))
+    cases.append(("menu.particles.objects", particle_frame(ParticleList(PARTICLES, *size))))
+    if np is not None:
+        cases.append((f"menu.particles[{MANY_PARTICLES}]",
+                      particle_frame(ParticleField(MANY_PARTICLES, *size, seed=1))))
+    return cases
+
+
+def time_case(draw, iterations, warmup):
+    """Per-call times in seconds"""
+    for _ in range(warmup):
+        draw()
+    clock = time.perf_counter
+    samples = []
+    for _ in range(iterations):
+        start = clock()
+        draw()
+        samples.append(clock() - start)
+    return samples
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    count = len(samples)
+
+    def percentile(p):
+        return samples[min(count - 1, int(p / 100 * count))] * 1e6
+
+    mean = sum(samples) / count
+    return {"mean_us": mean * 1e6, "fps": 1 / mean if mean else 0.0,
+            "p50_us": percentile(50), "p95_us": percentile(95), "p99_us": percentile(99)}
+
+
+def compare(results, baseline, threshold):
+    """Print the median change per case; returns the names of regressed cases"""
+    regressions = []
+    print(f"\n{'case':<38}{'base p50':>12}{'now p50':>12}{'change':>10}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<38}{'-':>12}{stats['p50_us']:>10.1f}us{'new':>10}")
+            continue
+        change = stats["p50_us"] / base["p50_us"] - 1 if base["p50_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<38}{base['p50_us']:>10.1f}us{stats['p50_us']:>10.1f}us{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless render benchmarks")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"write the results as a baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="median slowdown counted as a regression (default 0.15 = 15%%)")
+    args = parser.parse_args()
+
+    screen = pygame.display.set_mode((1280, 720))
+    results = {}
+    print(f"{'case':<38}{'fps':>10}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, draw in make_cases(screen):
+        if args.filter not in name:
+            continue
+        stats = results[name] = summarize(time_case(draw, args.iterations, args.warmup))
+        print(f"{name:<38}{stats['fps']:>10.0f}{stats['mean_us']:>8.1f}us{stats['p50_us']:>8.1f}us"
+              f"{stats['p95_us']:>8.1f}us{stats['p99_us']:>8.1f}us")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "pygame": pygame.version.ver,
+                       "machine": platform.machine(), "iterations": args.iterations,
+                       "results": results}, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# bench_rules.py - Micro-benchmarks for the rules hot paths of both engines
+#
+# Usage: python benchmarks/bench_rules.py [--rounds N] [--filter TEXT] [--json PATH]
+#
+# The multiplayer rules (Block on a Grid) and the single-player
+# TetrisEngine implement the same operations, so every group below times
+# each implementation on identical board states: collision checks, moves
+# and rotations on boards with 0/10/18 filled rows, locking a piece, and
+# line clears for several clear patterns. --json writes the statistics in
+# the layout pytest-benchmark uses ("benchmarks" with per-case "stats"),
+# so the numbers can be tracked over time with the same tooling.
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grid import Grid
+from blocks import BLOCK_CLASSES
+from engine import TetrisEngine, SHAPES
+
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# Filled rows (one gap each) under the pieces
+FILL_LEVELS = (0, 10, 18)
+
+# Rows completed on top of a half-filled board before clearing
+CLEAR_PATTERNS = {
+    "none": (),
+    "single": (19,),
+    "double": (18, 19),
+    "split": (17, 19),
+    "tetris": (16, 17, 18, 19),
+}
+
+# Operations per timed round
+OPS = 1000
+
+
+def board_rows(filled, full_rows=(), seed=0):
+    """Bottom `filled` rows with one gap each, plus `full_rows` completely filled"""
+    rng = random.Random(seed)
+    rows = [[0] * GRID_WIDTH for _ in range(GRID_HEIGHT)]
+    for row in range(GRID_HEIGHT - filled, GRID_HEIGHT):
+        gap = rng.randrange(GRID_WIDTH)
+        rows[row] = [0 if col == gap else rng.randint(1, 7) for col in range(GRID_WIDTH)]
+    for row in full_rows:
+        rows[row] = [rng.randint(1, 7) for _ in range(GRID_WIDTH)]
+    return rows
+
+
+def make_grid(grid_class, rows):
+    grid = grid_class(GRID_WIDTH, GRID_HEIGHT, 30)
+    grid.grid = [row[:] for row in rows]
+    grid.metrics.rebuild(grid.grid)
+    return grid
+
+
+def make_engine(rows):
+    engine = TetrisEngine(seed=1)
+    engine.grid = [row[:] for row in rows]
+    engine.metrics.rebuild(engine.grid)
+    return engine
+
+
+def rotated(shape, turns):
+    for _ in range(turns):
+        shape = [list(row) for row in zip(*shape[::-1])]
+    return shape
+
+
+def make_probes(count, rng):
+    """(piece, rotation, row, col) positions, including out-of-bounds ones"""
+    return [(rng.randrange(len(SHAPES)), rng.randrange(4), rng.randrange(-1, GRID_HEIGHT),
+             rng.randrange(-2, GRID_WIDTH)) for _ in range(count)]
+
+
+def probe_blocks(probes):
+    blocks = []
+    for piece, rotation, row, col in probes:
+        block = BLOCK_CLASSES[piece]()
+        block.rotation_state, block.row_offset, block.col_offset = rotation, row, col
+        blocks.append(block)
+    return blocks
+
+
+def spawn_block(grid):
+    """A piece at the top centre, as the multiplayer game spawns it"""
+    block = BLOCK_CLASSES[2]()
+    block.col_offset = grid.num_cols // 2 - block.widths[0] // 2 - block.bounds[0][1]
+    return block
+
+
+def landed_block(grid, rng):
+    block = BLOCK_CLASSES[rng.randrange(len(BLOCK_CLASSES))]()
+    block.col_offset = rng.randrange(0, GRID_WIDTH - 3)
+    block.row_offset = grid.landing_row(block)
+    return block
+
+
+# Each case builder takes its parameter and returns setup(): an untimed
+# function that prepares one round and returns the callable doing OPS operations.
+
+def collision_grid(grid_class):
+    def build(filled):
+        grid = make_grid(grid_class, board_rows(filled))
+        blocks = probe_blocks(make_probes(OPS, random.Random(1)))
+
+        def setup():
+            def run():
+                for block in blocks:
+                    block.is_valid_position(grid)
+            return run
+        return setup
+    return build
+
+
+def collision_engine(filled):
+    engine = make_engine(board_rows(filled))
+    probes = [(rotated(SHAPES[piece], rotation), col, row)
+              for piece, rotation, row, col in make_probes(OPS, random.Random(1))]
+
+    def setup():
+        def run():
+            for piece, x, y in probes:
+                engine.check_collision(piece, x, y)
+        return run
+    return setup
+
+
+def move_grid(grid_class):
+    def build(filled):
+        grid = make_grid(grid_class, board_rows(filled))
+        block = spawn_block(grid)
+
+        def setup():
+            def run():
+                for _ in range(OPS // 2):
+                    block.move(0, 1, grid)
+                    block.move(0, -1, grid)
+            return run
+        return setup
+    return build
+
+
+def move_engine(filled):
+    engine = make_engine(board_rows(filled))
+
+    def setup():
+        engine.events.clear()
+
+        def run():
+            for _ in range(OPS // 2):
+                engine.move(1)
+                engine.move(-1)
+        return run
+    return setup
+
+
+def rotate_grid(grid_class):
+    def build(filled):
+        grid = make_grid(grid_class, board_rows(filled))
+        block = spawn_block(grid)
+        block.row_offset = 1
+
+        def setup():
+            def run():
+                for _ in range(OPS):
+                    block.rotate(grid)
+            return run
+        return setup
+    return build
+
+
+def rotate_engine(filled):
+    engine = make_engine(board_rows(filled))
+    engine.piece_y = 1
+
+    def setup():
+        engine.events.clear()
+
+        def run():
+            for _ in range(OPS):
+                engine.rotate_piece()
+        return run
+    return setup
+
+
+def place_grid(grid_class):
+    def build(filled):
+        rows = board_rows(filled)
+
+        def setup():
+            rng = random.Random(2)
+            grids = [make_grid(grid_class, rows) for _ in range(OPS)]
+            pairs = [(grid, landed_block(grid, rng)) for grid in grids]
+
+            def run():
+                for grid, block in pairs:
+                    grid.place_block(block)
+            return run
+        return setup
+    return build
+
+
+def place_engine(filled):
+    rows = board_rows(filled)
+
+    def setup():
+        rng = random.Random(2)
+        engines = []
+        for _ in range(OPS):
+            engine = make_engine(rows)
+            engine.piece_x = rng.randrange(0, GRID_WIDTH - len(engine.current_piece[0]) + 1)
+            engine.piece_y = engine.landing_row()
+            engines.append(engine)
+
+        def run():
+            for engine in engines:
+                engine.merge_piece()
+        return run
+    return setup
+
+
+def clear_grid(grid_class):
+    def build(pattern):
+        rows = board_rows(10, CLEAR_PATTERNS[pattern])
+
+        def setup():
+            grids = [make_grid(grid_class, rows) for _ in range(OPS)]
+
+            def run():
+                for grid in grids:
+                    grid.clear_rows()
+            return run
+        return setup
+    return build
+
+
+def clear_engine(pattern):
+    rows = board_rows(10, CLEAR_PATTERNS[pattern])
+
+    def setup():
+        engines = [make_engine(rows) for _ in range(OPS)]
+
+        def run():
+            for engine in engines:
+                engine.clear_lines()
+        return run
+    return setup
+
+
+# group, parameter name, parameter values, {implementation: case builder}
+GROUPS = [
+    ("is_valid_position", "fill", FILL_LEVELS, {
+        "Block+Grid": collision_grid(Grid),
+        "TetrisEngine.check_collision": collision_engine}),
+    ("move", "fill", FILL_LEVELS, {
+        "Block+Grid": move_grid(Grid),
+        "TetrisEngine.move": move_engine}),
+    ("rotate", "fill", FILL_LEVELS, {
+        "Block+Grid": rotate_grid(Grid),
+        "TetrisEngine.rotate_piece": rotate_engine}),
+    ("place_block", "fill", FILL_LEVELS, {
+        "Grid": place_grid(Grid),
+        "TetrisEngine.merge_piece": place_engine}),
+    ("clear_rows", "pattern", tuple(CLEAR_PATTERNS), {
+        "Grid": clear_grid(Grid),
+        "TetrisEngine.clear_lines": clear_engine}),
+]
+
+
+def run_case(setup, rounds):
+    """Seconds per operation for each round (the best round is the least noisy)"""
+    times = []
+    for _ in range(rounds):
+        run = setup()
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) / OPS)
+    return times
+
+
+def stats(times):
+    mean = statistics.mean(times)
+    return {"min": min(times), "max": max(times), "mean": mean,
+            "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "median": statistics.median(times), "rounds": len(times), "iterations": OPS,
+            "ops": 1 / mean if mean else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the rules hot paths")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--json", metavar="PATH", help="write pytest-benchmark style JSON results")
+    args = parser.parse_args()
+
+    benchmarks = []
+    for group, param_name, values, implementations in GROUPS:
+        print(f"\n{group:<20}{param_name:<10}" + "".join(f"{name:>30}" for name in implementations))
+        for value in values:
+            medians = {}
+            for impl, build in implementations.items():
+                name = f"{group}[{impl}-{value}]"
+                if args.filter not in name:
+                    continue
+                case = stats(run_case(build(value), args.rounds))
+                medians[impl] = case["median"]
+                benchmarks.append({"group": group, "name": name, "fullname": f"bench_rules.py::{name}",
+                                   "params": {"implementation": impl, param_name: value},
+                                   "stats": case})
+            if not medians:
+                continue
+            fastest = min(medians.values())
+            row = "".join(f"{medians[impl] * 1e6:>19.3f}us ({medians[impl] / fastest:>4.1f}x)"
+                          if impl in medians else f"{'-':>30}" for impl in implementations)
+            print(f"{'':<20}{str(value):<10}{row}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"machine_info": {"python_version": platform.python_version(),
+                                        "machine": platform.machine(), "node": platform.node()},
+                       "datetime": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                       "benchmarks": benchmarks}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,75 @@
-import pygame
+from position import Position
+
+# Every block has four rotation states; shapes with fewer distinct
+# orientations repeat them so `(rotation_state + 1) % NUM_ROTATIONS` is safe.
+NUM_ROTATIONS = 4
+
+
 class Block:
     """
     Base class for all Tetris blocks.
 
+    Shape data is shared by every instance of a block class (flyweight).
+    Subclasses only declare:
+
     - `id`: A unique integer to store in the Grid (1..7).
     - `color`: RGB tuple for drawing.
-    - `cells`: A dict { rotation_state: [Position, Position, ...] }
+    - `shape`: A dict { rotation_state: [(row, col), ...] }.
+
+    and the tables below are computed once per class when it is defined:
+
+    - `cells`: tuple of rotation states -> tuple of Position(row, col).
+    - `offsets`: tuple of rotation states -> tuple of (row, col).
+    - `bounds`: per rotation (min_row, min_col, max_row, max_col).
+    - `widths`, `heights`: per rotation size in cells.
+    - `bottoms`: per rotation tuple of (col, lowest row) for each occupied column.
+
+    An instance only carries its rotation and position (plus cell_size
+    for drawing):
+
     - `row_offset`, `col_offset`: Current top-left position on the grid.
     - `rotation_state`: Which "orientation" is currently active (0..3).
     """
 
-    def __init__(self, block_id, color, cell_size=30):
-        self.id = block_id
-        self.color = color
-        self.cell_size = cell_size
+    __slots__ = ("cell_size", "rotation_state", "row_offset", "col_offset")
+
+    id = 0
+    color = (255, 255, 255)
+    shape = {}
 
-        # Dictionary of rotation states -> list of Position objects
-        self.cells = {}
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not cls.shape:
+            return
+        states = [cls.shape[r % len(cls.shape)] for r in range(NUM_ROTATIONS)]
+        cls.offsets = tuple(tuple((r, c) for r, c in state) for state in states)
+        cls.cells = tuple(tuple(Position(r, c) for r, c in state) for state in cls.offsets)
+
+        bounds = []
+        bottoms = []
+        for state in cls.offsets:
+            min_row = min(r for r, _ in state)
+            max_row = max(r for r, _ in state)
+            min_col = min(c for _, c in state)
+            max_col = max(c for _, c in state)
+            bounds.append((min_row, min_col, max_row, max_col))
+            lowest = {}
+            for r, c in state:
+                lowest[c] = max(lowest.get(c, r), r)
+            bottoms.append(tuple(sorted(lowest.items())))
+        cls.bounds = tuple(bounds)
+        cls.widths = tuple(max_col - min_col + 1 for _, min_col, _, max_col in bounds)
+        cls.heights = tuple(max_row - min_row + 1 for min_row, _, max_row, _ in bounds)
+        cls.bottoms = tuple(bottoms)
+
+    def __init__(self, cell_size=30):
+        self.cell_size = cell_size
 
         # Block’s position on the grid
         self.row_offset = 0
         self.col_offset = 0
 
-        # 0, 1, 2, 3 for the 4 possible rotations (some blocks only need 2 or 1)
+        # 0, 1, 2, 3 for the 4 rotations (some blocks repeat states)
         self.rotation_state = 0
 
     def move(self, drow, dcol, grid):
@@ -30,16 +77,13 @@ class Block:
         Attempt to move the block by (drow, dcol).
         Returns True if move is valid; False if it had to revert.
         """
-        original_row_offset = self.row_offset
-        original_col_offset = self.col_offset
-
         self.row_offset += drow
         self.col_offset += dcol
 
         if not self.is_valid_position(grid):
             # Revert if invalid
-            self.row_offset = original_row_offset
-            self.col_offset = original_col_offset
+            self.row_offset -= drow
+            self.col_offset -= dcol
             return False
 
         return True
@@ -50,7 +94,7 @@ class Block:
         Revert if invalid.
         """
         old_state = self.rotation_state
-        self.rotation_state = (self.rotation_state + 1) % len(self.cells)
+        self.rotation_state = (old_state + 1) % NUM_ROTATIONS
 
         if not self.is_valid_position(grid):
             # Revert rotation if invalid
@@ -60,10 +104,11 @@ class Block:
         """
         Returns a list of (row, col) for the current rotation and offsets.
         """
-        shape_positions = self.cells[self.rotation_state]
+        row_offset = self.row_offset
+        col_offset = self.col_offset
         return [
-            (p.row + self.row_offset, p.col + self.col_offset)
-            for p in shape_positions
+            (r + row_offset, c + col_offset)
+            for r, c in self.offsets[self.rotation_state]
         ]
 
     def is_valid_position(self, grid):
@@ -72,24 +117,17 @@ class Block:
           1) Inside the grid boundaries,
           2) Not colliding with existing blocks.
         """
-        for (r, c) in self.get_cell_positions():
-            # Check out-of-bounds
-            if r < 0 or r >= grid.num_rows or c < 0 or c >= grid.num_cols:
-                return False
-            # Check collision
-            if grid.grid[r][c] != 0:
+        rotation = self.rotation_state
+        top = self.row_offset
+        left = self.col_offset
+        # Check out-of-bounds once for the whole bounding box
+        min_row, min_col, max_row, max_col = self.bounds[rotation]
+        if (top + min_row < 0 or top + max_row >= grid.num_rows or
+                left + min_col < 0 or left + max_col >= grid.num_cols):
+            return False
+        # Check collision
+        cells = grid.grid
+        for (r, c) in self.offsets[rotation]:
+            if cells[top + r][left + c] != 0:
                 return False
         return True
-
-    def draw(self, surface, offset_x=0, offset_y=0):
-        """
-        Draw the block with the given offsets.
-        """
-        for (r, c) in self.get_cell_positions():
-            rect = pygame.Rect(
-                offset_x + c * self.cell_size + 1,
-                offset_y + r * self.cell_size + 1,
-                self.cell_size - 1,
-                self.cell_size - 1
-            )
-            pygame.draw.rect(surface, self.color, rect)
@@ -0,0 +1,142 @@
+# board_metrics.py - Incrementally maintained board statistics
+#
+# Grid and TetrisEngine own a BoardMetrics and update it whenever a
+# cell is locked or rows are cleared, so bots and UI features can read column
+# heights, holes, row fill counts and bumpiness in O(1) instead of scanning
+# the whole board.
+
+
+class BoardMetrics:
+    """
+    Per-column heights and holes, per-row fill counts and their aggregates.
+
+    - Height of a column: rows from its topmost filled cell to the bottom (0 if empty).
+    - Hole: an empty cell with a filled cell somewhere above it in its column.
+    - Bumpiness: sum of absolute height differences of adjacent columns.
+
+    Call `add_cell` for every locked cell and `clear_rows` with the full rows
+    *before* they are removed from the grid. `rebuild` recomputes everything.
+    """
+
+    def __init__(self, num_cols, num_rows):
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self._heights = [0] * num_cols
+        self._column_holes = [0] * num_cols
+        self._row_fill = [0] * num_rows
+        self._holes = 0
+        self._bumpiness = 0
+        self._aggregate_height = 0
+
+    # --- Read-only views ---
+
+    @property
+    def column_heights(self):
+        return tuple(self._heights)
+
+    @property
+    def column_holes(self):
+        return tuple(self._column_holes)
+
+    @property
+    def row_fill(self):
+        return tuple(self._row_fill)
+
+    def has_full_row(self):
+        """True if some row is completely filled (a line clear is due)"""
+        return self.num_cols in self._row_fill
+
+    @property
+    def holes(self):
+        return self._holes
+
+    @property
+    def bumpiness(self):
+        return self._bumpiness
+
+    @property
+    def aggregate_height(self):
+        return self._aggregate_height
+
+    @property
+    def max_height(self):
+        return max(self._heights)
+
+    def height(self, col):
+        return self._heights[col]
+
+    def surface_row(self, col):
+        """Row index of the column's topmost filled cell (num_rows if empty)"""
+        return self.num_rows - self._heights[col]
+
+    # --- Updates ---
+
+    def _set_height(self, col, height):
+        heights = self._heights
+        old = heights[col]
+        if old == height:
+            return
+        if col > 0:
+            self._bumpiness += abs(height - heights[col - 1]) - abs(old - heights[col - 1])
+        if col < self.num_cols - 1:
+            self._bumpiness += abs(height - heights[col + 1]) - abs(old - heights[col + 1])
+        self._aggregate_height += height - old
+        heights[col] = height
+
+    def add_cell(self, row, col):
+        """Record that the empty cell (row, col) has been filled"""
+        self._row_fill[row] += 1
+        top = self.num_rows - self._heights[col]
+        if row < top:
+            # New surface: the empty cells between it and the old surface become holes
+            new_holes = top - row - 1
+            self._set_height(col, self.num_rows - row)
+        else:
+            # Filling a hole below the surface
+            new_holes = -1
+        self._column_holes[col] += new_holes
+        self._holes += new_holes
+
+    def clear_rows(self, rows, grid):
+        """
+        Account for removing the full `rows` from `grid` (a list of rows of
+        cell values, still containing them). Cleared rows hold no holes, so
+        only columns whose surface was on a cleared row need a short walk down
+        to their next filled cell; the empty cells passed were holes.
+        """
+        if not rows:
+            return
+        cleared = set(rows)
+        count = len(cleared)
+        for col in range(self.num_cols):
+            top = self.num_rows - self._heights[col]
+            if top not in cleared:
+                self._set_height(col, self._heights[col] - count)
+                continue
+            row = top
+            skipped_empty = 0
+            while row < self.num_rows and (row in cleared or not grid[row][col]):
+                if row not in cleared:
+                    skipped_empty += 1
+                row += 1
+            self._column_holes[col] -= skipped_empty
+            self._holes -= skipped_empty
+            if row == self.num_rows:
+                self._set_height(col, 0)
+            else:
+                # Rows below the new surface keep their place; cleared rows
+                # below it are removed, so its height drops by that many.
+                cleared_below = sum(1 for r in cleared if r > row)
+                self._set_height(col, self.num_rows - row - cleared_below)
+
+        for row in sorted(cleared, reverse=True):
+            del self._row_fill[row]
+        self._row_fill[0:0] = [0] * count
+
+    def rebuild(self, grid):
+        """Recompute all metrics from scratch (e.g. after loading a board)"""
+        self.__init__(self.num_cols, self.num_rows)
+        for row in range(self.num_rows - 1, -1, -1):
+            for col in range(self.num_cols):
+                if grid[row][col]:
+                    self.add_cell(row, col)
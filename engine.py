@@ -0,0 +1,324 @@
+# engine.py - Headless Tetris rules engine
+#
+# Holds the single-player rules (collision, locking, line clears, scoring and
+# gravity) without importing pygame, so games can be simulated without a
+# display or mixer. SinglePlayerGame wraps a TetrisEngine for rendering,
+# input handling and sound.
+
+from collections import namedtuple
+
+from board_metrics import BoardMetrics
+from pieces import PieceQueue, new_seed
+
+# Board size
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# Milliseconds per gravity drop, indexed by level - 1
+LEVEL_SPEED = [1000, 800, 600, 500, 400, 300, 250, 200, 150, 100]
+
+# Tetromino shapes (I, O, T, S, Z, J, L); cell value is color_index + 1
+SHAPES = [
+    [[1, 1, 1, 1]],  # I
+    [[1, 1], [1, 1]],  # O
+    [[0, 1, 0], [1, 1, 1]],  # T
+    [[0, 1, 1], [1, 1, 0]],  # S
+    [[1, 1, 0], [0, 1, 1]],  # Z
+    [[1, 0, 0], [1, 1, 1]],  # J
+    [[0, 0, 1], [1, 1, 1]]  # L
+]
+
+
+
+def _rotations(shape):
+    """The four clockwise rotations of a shape, as tuples of tuples"""
+    rotations = []
+    for _ in range(4):
+        rotations.append(tuple(tuple(row) for row in shape))
+        shape = [list(row) for row in zip(*shape[::-1])]
+    return tuple(rotations)
+
+
+# Per shape and rotation, computed once so moving and rotating a piece
+# allocates nothing: the rotated shape, its filled (dy, dx) cells and the
+# lowest filled dy of each occupied column as (dx, dy)
+ROTATIONS = tuple(_rotations(shape) for shape in SHAPES)
+PIECE_CELLS = tuple(tuple(tuple((dy, dx) for dy, row in enumerate(piece) for dx, cell in enumerate(row) if cell)
+                          for piece in rotations) for rotations in ROTATIONS)
+PIECE_BOTTOMS = tuple(tuple(tuple((dx, max(dy for dy, row in enumerate(piece) if row[dx]))
+                                  for dx in range(len(piece[0])) if any(row[dx] for row in piece))
+                            for piece in rotations) for rotations in ROTATIONS)
+
+# Actions accepted by TetrisEngine.step
+NOOP = 0
+LEFT = 1
+RIGHT = 2
+DOWN = 3    # Soft drop (+1 point when the piece moves)
+ROTATE = 4
+DROP = 5    # Hard drop (+2 points per row)
+ACTIONS = (NOOP, LEFT, RIGHT, DOWN, ROTATE, DROP)
+
+# Result of a single TetrisEngine.step call.
+# `events` lists what happened ("move", "rotate", "drop", "clear",
+# "level_up", "game_over") so a front end can play sounds for them.
+StepResult = namedtuple("StepResult", ["moved", "reward", "lines", "done", "events"])
+
+
+class TetrisEngine:
+    """Single-player Tetris rules with a reset(seed) / step(action) API."""
+
+    def __init__(self, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT, piece_mode="uniform", preview=1):
+        self.width = width
+        self.height = height
+        self.piece_mode = piece_mode
+        self.preview_size = max(1, preview)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Start a new game. The same seed always yields the same piece sequence;
+        without one a fresh seed is picked and kept in `self.seed`.
+        """
+        self.seed = new_seed() if seed is None else seed
+        self.pieces_queue = PieceQueue(self.seed, self.piece_mode, self.preview_size)
+
+        self.grid = [[0 for _ in range(self.width)] for _ in range(self.height)]
+        self.metrics = BoardMetrics(self.width, self.height)
+        self.empty_row = (0,) * self.width
+        self.last_cleared_rows = ()  # Row indices removed by the last clear_lines
+        self.current_piece = None
+        self.next_piece = None
+        self.color_index = 0
+        self.rotation = 0  # Clockwise rotations applied to the current piece (0..3)
+        self.next_color_index = None
+        self.piece_x = 0
+        self.piece_y = 0
+
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.pieces = 0  # Number of pieces spawned
+        self.game_over = False
+
+        self.speed = LEVEL_SPEED[0]
+        self.drop_timer = 0  # ms accumulated towards the next gravity drop
+        self.elapsed = 0  # Simulated game time in ms
+
+        self.events = []
+        self.new_piece()
+        return self
+
+    @property
+    def preview(self):
+        """Indices of the upcoming pieces (the first one is next_piece)"""
+        return self.pieces_queue.peek()
+
+    def new_piece(self):
+        """Take the next piece from the queue and update the next-piece preview"""
+        self.color_index = self.pieces_queue.next()
+        self.current_piece = ROTATIONS[self.color_index][0]
+
+        self.next_color_index = self.pieces_queue.peek(1)[0]
+        self.next_piece = SHAPES[self.next_color_index]
+
+        # Starting position
+        self.rotation = 0
+        self.piece_x = self.width // 2 - len(self.current_piece[0]) // 2
+        self.piece_y = 0
+        self.pieces += 1
+
+        # Check if new piece overlaps with existing blocks (game over)
+        if self.check_collision():
+            self.game_over = True
+            self.events.append("game_over")
+
+    def check_collision(self, piece=None, x=None, y=None):
+        """Check if a piece (default: the current one) collides with borders or other pieces"""
+        if piece is None:
+            cells = PIECE_CELLS[self.color_index][self.rotation]
+        else:
+            cells = [(dy, dx) for dy, row in enumerate(piece) for dx, cell in enumerate(row) if cell]
+        return self.cells_collide(cells, self.piece_x if x is None else x, self.piece_y if y is None else y)
+
+    def cells_collide(self, cells, x, y):
+        """Check if (dy, dx) `cells` placed at (x, y) hit the borders or locked blocks"""
+        grid = self.grid
+        width = self.width
+        height = self.height
+        for dy, dx in cells:
+            grid_x = x + dx
+            grid_y = y + dy
+            if (grid_x < 0 or grid_x >= width or
+                    grid_y >= height or
+                    (grid_y >= 0 and grid[grid_y][grid_x])):
+                return True
+        return False
+
+    def merge_piece(self):
+        """Merge current piece with the grid"""
+        value = self.color_index + 1
+        for dy, dx in PIECE_CELLS[self.color_index][self.rotation]:
+            y = self.piece_y + dy
+            if 0 <= y < self.height:
+                x = self.piece_x + dx
+                if not self.grid[y][x]:
+                    self.metrics.add_cell(y, x)
+                self.grid[y][x] = value
+        self.events.append("drop")
+
+    def clear_lines(self):
+        """
+        Clear completed lines, update score/level and return number of lines
+        cleared. Their row indices are kept in `last_cleared_rows`.
+        """
+        if not self.metrics.has_full_row():
+            self.last_cleared_rows = ()
+            return 0
+        grid = self.grid
+        full_rows = [y for y in range(self.height) if all(grid[y])]
+        self.last_cleared_rows = tuple(full_rows)
+        lines_cleared_count = len(full_rows)
+        if lines_cleared_count > 0:
+            self.metrics.clear_rows(full_rows, grid)
+            # One bottom-up pass from the lowest cleared row: rows above it
+            # slide down, and the cleared row lists are zeroed and reused
+            # as the new empty rows at the top
+            full = set(full_rows)
+            recycled = [grid[y] for y in full_rows]
+            write = full_rows[-1]
+            for read in range(write - 1, -1, -1):
+                if read not in full:
+                    grid[write] = grid[read]
+                    write -= 1
+            for y, row in enumerate(recycled):
+                row[:] = self.empty_row
+                grid[y] = row
+
+            self.events.append("clear")
+            self.score += lines_cleared_count * lines_cleared_count * 100 * self.level
+            self.lines_cleared += lines_cleared_count
+            old_level = self.level
+            self.level = min(10, self.lines_cleared // 10 + 1)
+            if self.level > old_level:
+                self.events.append("level_up")
+            self.speed = LEVEL_SPEED[min(9, self.level - 1)]
+        return lines_cleared_count
+
+    def move(self, dx):
+        """Shift the piece horizontally if possible"""
+        if self.game_over:
+            return False
+        self.piece_x += dx
+        if self.check_collision():
+            self.piece_x -= dx
+            return False
+        self.events.append("move")
+        return True
+
+    def move_down(self):
+        """Move the piece down one row, locking it if it cannot move"""
+        if self.game_over:
+            return False
+        self.piece_y += 1
+        if self.check_collision():
+            self.piece_y -= 1
+            self.merge_piece()
+            self.clear_lines()
+            self.new_piece()
+            return False
+        return True
+
+    def rotate_piece(self):
+        """Rotate the current piece clockwise"""
+        if self.game_over:
+            return False
+        rotation = (self.rotation + 1) % 4
+        if self.cells_collide(PIECE_CELLS[self.color_index][rotation], self.piece_x, self.piece_y):
+            return False
+
+        self.rotation = rotation
+        self.current_piece = ROTATIONS[self.color_index][rotation]
+        self.events.append("rotate")
+        return True
+
+    def landing_row(self):
+        """
+        Row the current piece would lock at if dropped straight down.
+
+        Computed from the column heights kept in `metrics`: the piece rests on
+        whichever of its columns meets the surface first. If the piece is
+        already below the surface of one of its columns (tucked under an
+        overhang) it falls back to stepping down with check_collision.
+        """
+        x = self.piece_x
+        y = self.piece_y
+        surface_row = self.metrics.surface_row
+        landing = self.height
+        for dx, bottom in PIECE_BOTTOMS[self.color_index][self.rotation]:
+            surface = surface_row(x + dx)
+            if y + bottom >= surface:
+                break
+            landing = min(landing, surface - bottom - 1)
+        else:
+            return landing
+
+        while not self.check_collision(y=y + 1):
+            y += 1
+        return y
+
+    def drop_piece(self):
+        """Hard drop the piece to the bottom, scoring 2 points per row"""
+        if self.game_over:
+            return False
+        landing = self.landing_row()
+        self.score += 2 * (landing - self.piece_y)
+        self.piece_y = landing
+        self.move_down()  # Cannot move further, so this locks the piece
+        return True
+
+    def advance(self, dt):
+        """Advance the simulated clock by `dt` ms, applying gravity drops"""
+        if self.game_over:
+            return
+        self.elapsed += dt
+        self.drop_timer += dt
+        while self.drop_timer >= self.speed and not self.game_over:
+            # Several pending drops (long frames, fast levels) move the piece
+            # straight to where they would take it instead of row by row
+            fall = min(self.drop_timer // self.speed, self.landing_row() - self.piece_y)
+            if fall > 0:
+                self.piece_y += fall
+                self.drop_timer -= fall * self.speed
+            else:
+                self.drop_timer -= self.speed
+                self.move_down()
+
+    def step(self, action, dt=0):
+        """
+        Apply one action, then advance gravity by `dt` ms.
+        Returns a StepResult with the score gained and events raised.
+        """
+        self.events = []
+        score_before = self.score
+        lines_before = self.lines_cleared
+
+        moved = False
+        if action == LEFT:
+            moved = self.move(-1)
+        elif action == RIGHT:
+            moved = self.move(1)
+        elif action == DOWN:
+            moved = self.move_down()
+            if moved:
+                self.score += 1
+        elif action == ROTATE:
+            moved = self.rotate_piece()
+        elif action == DROP:
+            moved = self.drop_piece()
+
+        if dt:
+            self.advance(dt)
+
+        return StepResult(moved, self.score - score_before,
+                          self.lines_cleared - lines_before,
+                          self.game_over, self.events)
@@ -1,5 +1,5 @@
-import  pygame
 import random
+from board_metrics import BoardMetrics
 from colors import Colors
 class Grid:
     def __init__(self, num_cols, num_rows, cell_size):
@@ -13,56 +13,86 @@ class Grid:
             for _ in range(self.num_rows)
         ]
 
+        # Column heights, holes, row fill counts and bumpiness, kept up to
+        # date by place_block and clear_rows
+        self.metrics = BoardMetrics(num_cols, num_rows)
+        self.empty_row = (0,) * num_cols
+        self.last_cleared_rows = ()
+
         # Get cell colors from your Colors class
         self.colors = Colors.get_cell_colors()
 
-    def draw(self, screen, offset_x=0, offset_y=0):
+    def landing_row(self, block):
         """
-        Draw each cell in the grid, applying offset_x and offset_y.
-        Also draw a white border and faint grid lines for empty cells.
+        Row offset where the block would lock if dropped straight down.
+        Uses the column heights in `metrics`; if the block is already below
+        the surface of one of its columns (under an overhang) it falls back
+        to stepping down with is_valid_position.
         """
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                cell_value = self.grid[row][col]
-                # Use colors from the Colors class
-                if cell_value == 0:
-                    color = (30, 30, 30)  # Faint gray for empty cells
-                else:
-                    color = self.colors[min(cell_value, len(self.colors) - 1)]
-                cell_rect = pygame.Rect(
-                    offset_x + col * self.cell_size,
-                    offset_y + row * self.cell_size,
-                    self.cell_size - 1,
-                    self.cell_size - 1
-                )
-                pygame.draw.rect(screen, color, cell_rect)
-                # Draw faint grid lines for all cells
-                pygame.draw.rect(screen, (60, 60, 60), cell_rect, 1)
-        # Draw a white border around the grid
-        border_rect = pygame.Rect(
-            offset_x, offset_y,
-            self.num_cols * self.cell_size, self.num_rows * self.cell_size
-        )
-        pygame.draw.rect(screen, (255, 255, 255), border_rect, 2)
+        top = block.row_offset
+        left = block.col_offset
+        surface_row = self.metrics.surface_row
+        landing = self.num_rows
+        for c, bottom in block.bottoms[block.rotation_state]:
+            surface = surface_row(left + c)
+            if top + bottom >= surface:
+                break
+            landing = min(landing, surface - bottom - 1)
+        else:
+            return landing
+
+        while True:
+            block.row_offset += 1
+            if not block.is_valid_position(self):
+                break
+        landing = block.row_offset - 1
+        block.row_offset = top
+        return landing
 
     def place_block(self, block):
         """
         Lock the block's cells into the grid (store its ID).
         """
-        for (row, col) in block.get_cell_positions():
+        top = block.row_offset
+        left = block.col_offset
+        for (r, c) in block.offsets[block.rotation_state]:
+            row = top + r
+            col = left + c
             if 0 <= row < self.num_rows and 0 <= col < self.num_cols:
+                if not self.grid[row][col]:
+                    self.metrics.add_cell(row, col)
                 self.grid[row][col] = block.id
 
     def clear_rows(self):
         """
         Clears any fully filled rows and returns the count of cleared rows.
+        Their indices (before clearing) are kept in `last_cleared_rows`.
+        """
+        if not self.metrics.has_full_row():
+            self.last_cleared_rows = ()
+            return 0
+        # If none of the cells in a row are 0, it's fully filled
+        full_rows = [row for row in range(self.num_rows) if all(self.grid[row])]
+        self.last_cleared_rows = tuple(full_rows)
+        if full_rows:
+            self.metrics.clear_rows(full_rows, self.grid)
+            self._compact(full_rows)
+        return len(full_rows)
+
+    def _compact(self, full_rows):
+        """
+        Remove `full_rows` (ascending) in one bottom-up pass: rows above the
+        lowest cleared row slide down into place and the cleared row lists
+        are zeroed and reused as the new empty rows at the top.
         """
-        cleared_rows = 0
-        # We'll check row by row.
-        for row in range(self.num_rows):
-            # If none of the cells in this row are 0, it's fully filled
-            if all(self.grid[row]):
-                del self.grid[row]
-                self.grid.insert(0, [0 for _ in range(self.num_cols)])
-                cleared_rows += 1
-        return cleared_rows
\ No newline at end of file
+        grid = self.grid
+        full = set(full_rows)
+        recycled = [grid[row] for row in full_rows]
+        write = full_rows[-1]
+        for read in range(write - 1, -1, -1):
+            if read not in full:
+                grid[write] = grid[read]
+                write -= 1
+        for row, cells in enumerate(recycled):
+            cells[:] = self.empty_row
+            grid[row] = cells
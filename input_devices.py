@@ -0,0 +1,91 @@
+# input_devices.py - Controller hot-plug tracking
+#
+# SDL reports controllers coming and going as JOYDEVICEADDED and
+# JOYDEVICEREMOVED events, so there is no need to tear down and re-enumerate
+# the joystick subsystem to notice a new one (which costs milliseconds and
+# shows up as a frame hitch). Screen loops pass their events through
+# `devices.handle_event` and look controllers up by player slot: slot 0 is
+# player 1, slot 1 player 2. A controller keeps its slot until unplugged; a
+# new one takes the lowest free slot.
+
+import pygame
+
+MAX_PLAYERS = 2
+
+
+class InputDeviceManager:
+    """Connected joysticks, keyed by SDL instance id and assigned to player slots"""
+
+    def __init__(self, num_slots=MAX_PLAYERS):
+        self.joysticks = {}  # instance id -> Joystick, in connection order
+        self.slots = [None] * num_slots  # instance id per player slot
+        self.scanned = False
+
+    def scan(self):
+        """Pick up controllers that were attached before the first event was seen"""
+        self.scanned = True
+        if not pygame.joystick.get_init():
+            pygame.joystick.init()
+        for index in range(pygame.joystick.get_count()):
+            self.add(index)
+
+    def add(self, device_index):
+        """Open the joystick at `device_index` and give it a slot; returns the Joystick or None"""
+        try:
+            joystick = pygame.joystick.Joystick(device_index)
+            if not joystick.get_init():
+                joystick.init()
+            instance_id = joystick.get_instance_id()
+        except pygame.error:
+            return None
+        if instance_id not in self.joysticks:
+            self.joysticks[instance_id] = joystick
+            print(f"Controller connected: {joystick.get_name()}")
+            self.assign_slots()
+        return self.joysticks[instance_id]
+
+    def remove(self, instance_id):
+        joystick = self.joysticks.pop(instance_id, None)
+        if joystick is None:
+            return
+        print(f"Controller disconnected: {joystick.get_name()}")
+        self.slots = [None if slot == instance_id else slot for slot in self.slots]
+        self.assign_slots()
+
+    def assign_slots(self):
+        """Fill free slots with controllers that have none, oldest first"""
+        waiting = [instance_id for instance_id in self.joysticks if instance_id not in self.slots]
+        for slot, instance_id in enumerate(self.slots):
+            if instance_id is None and waiting:
+                self.slots[slot] = waiting.pop(0)
+
+    def handle_event(self, event):
+        """Track hot-plug events; returns True if the event was one"""
+        if event.type == pygame.JOYDEVICEADDED:
+            self.add(event.device_index)
+        elif event.type == pygame.JOYDEVICEREMOVED:
+            self.remove(event.instance_id)
+        else:
+            return False
+        return True
+
+    def controller(self, slot=0):
+        """The Joystick playing in `slot`, or None"""
+        if not self.scanned:
+            self.scan()
+        if slot >= len(self.slots) or self.slots[slot] is None:
+            return None
+        return self.joysticks[self.slots[slot]]
+
+    def slot_of(self, event):
+        """Player slot of the controller that sent a joystick event, or None"""
+        if not self.scanned:
+            self.scan()
+        instance_id = getattr(event, "instance_id", None)
+        if instance_id is None or instance_id not in self.slots:
+            return None
+        return self.slots.index(instance_id)
+
+
+# Shared by every screen
+devices = InputDeviceManager()
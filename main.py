@@ -1,24 +1,13 @@
 import sys
 import pygame
 import math
-import random
 
 # Import centralized sound system
 from sound_manager import load_game_sounds, play_sound, play_music, stop_music
-
-def safe_get_events():
-    """Safely get pygame events with fallback"""
-    try:
-        return pygame.event.get()
-    except (SystemError, pygame.error):
-        try:
-            pygame.event.clear()
-            pygame.event.pump()
-            return []
-        except:
-            return []
-    except Exception:
-        return []
+from text_cache import render_text, get_font
+from pacing import IdleLoop, ANIMATED, STATIC, FPS_CHOICES, governor
+from input_devices import devices
+from particles import make_particles
 
 # Initialize pygame
 pygame.init()
@@ -45,42 +34,17 @@ YELLOW = (255, 255, 0)
 ORANGE = (255, 165, 0)
 
 # Setup display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+screen = governor.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
 pygame.display.set_caption("Tetris")
 
 # Fonts
-title_font = pygame.font.SysFont("Arial", 72, bold=True)
-menu_font = pygame.font.SysFont("Arial", 48)
-info_font = pygame.font.SysFont("Arial", 24)
-small_font = pygame.font.SysFont("Arial", 18)
+title_font = get_font("Arial", 72, bold=True)
+menu_font = get_font("Arial", 48)
+info_font = get_font("Arial", 24)
+small_font = get_font("Arial", 18)
 
-# Background particles for menu
-class Particle:
-    def __init__(self):
-        self.x = random.randint(0, SCREEN_WIDTH)
-        self.y = random.randint(0, SCREEN_HEIGHT)
-        self.vx = random.uniform(-0.5, 0.5)
-        self.vy = random.uniform(-0.5, 0.5)
-        self.size = random.randint(1, 3)
-        self.color = random.choice([CYAN, YELLOW, MAGENTA, GREEN, RED, BLUE, ORANGE])
-        self.alpha = random.randint(50, 200)
-    
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        
-        # Wrap around screen
-        if self.x < 0:
-            self.x = SCREEN_WIDTH
-        elif self.x > SCREEN_WIDTH:
-            self.x = 0
-        if self.y < 0:
-            self.y = SCREEN_HEIGHT
-        elif self.y > SCREEN_HEIGHT:
-            self.y = 0
-    
-    def draw(self, surface):
-        pygame.draw.circle(surface, (*self.color, self.alpha), (int(self.x), int(self.y)), self.size)
+# Background particles in the main menu
+MENU_PARTICLES = 50
 
 # Animated menu button class
 class MenuButton:
@@ -125,8 +89,8 @@ class MenuButton:
             self.glow = max(self.glow - dt * 0.01, 0.0)
     
     def draw(self, surface):
-        # Draw glow effect
-        if self.glow > 0:
+        # Draw glow effect (shed by the frame governor when frames run long)
+        if self.glow > 0 and governor.alpha_effects:
             glow_surface = pygame.Surface((self.rect.width + 40, self.rect.height + 40), pygame.SRCALPHA)
             glow_color = (*HIGHLIGHT, int(100 * self.glow))
             pygame.draw.rect(glow_surface, glow_color, glow_surface.get_rect(), border_radius=20)
@@ -138,8 +102,8 @@ class MenuButton:
         pygame.draw.rect(surface, WHITE, self.rect, 3, border_radius=15)
         
         # Draw text with shadow
-        text_shadow = menu_font.render(self.text, True, BLACK)
-        text_surface = menu_font.render(self.text, True, WHITE)
+        text_shadow = render_text(menu_font, self.text, BLACK)
+        text_surface = render_text(menu_font, self.text, WHITE)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_shadow, (text_rect.x + 2, text_rect.y + 2))
         surface.blit(text_surface, text_rect)
@@ -148,45 +112,10 @@ class MenuButton:
         if self.callback:
             self.callback()
 
-# Controller manager
-class ControllerManager:
-    def __init__(self):
-        self.controller = None
-        self.reconnect_timer = 0
-        self.check_controller()
-    
-    def check_controller(self):
-        """Check for connected controllers"""
-        pygame.joystick.quit()
-        pygame.joystick.init()
-        
-        if pygame.joystick.get_count() > 0:
-            self.controller = pygame.joystick.Joystick(0)
-            self.controller.init()
-            print(f"Controller connected: {self.controller.get_name()}")
-            return True
-        else:
-            self.controller = None
-            return False
-    
-    def update(self, dt):
-        """Periodically check for controller reconnection"""
-        if not self.controller:
-            self.reconnect_timer += dt
-            if self.reconnect_timer >= 3000:  # Check every 3 seconds
-                self.reconnect_timer = 0
-                self.check_controller()
-    
-    def get_controller(self):
-        return self.controller
-
-# Global controller manager
-controller_manager = ControllerManager()
-
 def start_single_player():
     """Start single player game"""
     from single_player import SinglePlayerGame
-    game = SinglePlayerGame(controller_manager.get_controller())
+    game = SinglePlayerGame()
     game.run(screen)
     # Return to main menu after game ends
     main_menu()
@@ -204,11 +133,12 @@ def show_settings():
 
 def main_menu():
     """Enhanced interactive main menu"""
-    clock = pygame.time.Clock()
+    # Full rate while in use; particles and title drift at a low rate once idle
+    loop = IdleLoop()
     running = True
     
     # Create particles for background effect
-    particles = [Particle() for _ in range(50)]
+    particles = make_particles(MENU_PARTICLES, SCREEN_WIDTH, SCREEN_HEIGHT)
     
     # Create animated menu buttons
     buttons = [
@@ -229,14 +159,13 @@ def main_menu():
     play_music()
     
     while running:
-        dt = clock.tick(60)
+        events = loop.events(ANIMATED)
+        dt = loop.dt
         mouse_pos = pygame.mouse.get_pos()
         
-        # Update controller manager
-        controller_manager.update(dt)
-        
-        # Handle events using safe_get_events
-        for event in safe_get_events():
+        for event in events:
+            if devices.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -272,10 +201,11 @@ def main_menu():
                 elif event.key == pygame.K_ESCAPE:
                     return
             
-            # Controller controls
-            if controller_manager.controller:
+            # Controller controls (player 1's pad)
+            controller = devices.controller(0)
+            if controller and devices.slot_of(event) == 0:
                 if event.type == pygame.JOYHATMOTION:
-                    hat_x, hat_y = controller_manager.controller.get_hat(0)
+                    hat_x, hat_y = controller.get_hat(0)
                     if hat_y == 1:  # Up
                         buttons[selected_index].selected = False
                         selected_index = (selected_index - 1) % len(buttons)
@@ -295,9 +225,9 @@ def main_menu():
                         buttons[selected_index].handle_click()
                         return
         
-        # Update particles
-        for particle in particles:
-            particle.update()
+        # Update particles (the governor thins them out when frames run long)
+        particle_count = governor.particle_count(len(particles))
+        particles.update(dt, particle_count)
         
         # Update buttons
         for i, button in enumerate(buttons):
@@ -318,15 +248,14 @@ def main_menu():
         screen.fill(GRAY)
         
         # Draw particles
-        for particle in particles:
-            particle.draw(screen)
+        particles.draw(screen, particle_count)
         
         # Draw animated title
-        title_surface = title_font.render("TETRIS", True, TITLE_COLOR)
+        title_surface = render_text(title_font, "TETRIS", TITLE_COLOR)
         title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100 + title_offset))
         
         # Title shadow
-        shadow_surface = title_font.render("TETRIS", True, BLACK)
+        shadow_surface = render_text(title_font, "TETRIS", BLACK)
         shadow_rect = shadow_surface.get_rect(center=(SCREEN_WIDTH // 2 + 3, 100 + title_offset + 3))
         screen.blit(shadow_surface, shadow_rect)
         screen.blit(title_surface, title_rect)
@@ -336,37 +265,51 @@ def main_menu():
             button.draw(screen)
         
         # Draw controller status
-        if controller_manager.controller:
-            status_text = info_font.render(f"Controller: {controller_manager.controller.get_name()}", True, WHITE)
+        controller = devices.controller(0)
+        if controller:
+            status_text = render_text(info_font, f"Controller: {controller.get_name()}", WHITE)
         else:
-            status_text = info_font.render("No controller connected", True, WHITE)
+            status_text = render_text(info_font, "No controller connected", WHITE)
         screen.blit(status_text, (20, SCREEN_HEIGHT - 30))
         
         # Draw version info
-        version_text = small_font.render("v1.0", True, WHITE)
+        version_text = render_text(small_font, "v1.0", WHITE)
         screen.blit(version_text, (SCREEN_WIDTH - 50, SCREEN_HEIGHT - 30))
         
-        pygame.display.flip()
+        governor.present()
+
+def fps_label():
+    return f"Target FPS: {governor.target_fps or 'Uncapped'}"
+
+def vsync_label():
+    return f"VSync: {'ON' if governor.vsync else 'OFF'}"
 
 def settings_menu():
     """Settings menu"""
-    clock = pygame.time.Clock()
+    global screen
+    # Nothing moves once the buttons settle, so it sleeps until input when idle
+    loop = IdleLoop()
     running = True
     
     buttons = [
         MenuButton(f"Sound: {'ON' if pygame.mixer.music.get_volume() > 0 else 'OFF'}", 
-                   SCREEN_WIDTH // 2, 250, 300, 60),
-        MenuButton("Back", SCREEN_WIDTH // 2, 350, 300, 60)
+                   SCREEN_WIDTH // 2, 220, 300, 60),
+        MenuButton(fps_label(), SCREEN_WIDTH // 2, 300, 300, 60),
+        MenuButton(vsync_label(), SCREEN_WIDTH // 2, 380, 300, 60),
+        MenuButton("Back", SCREEN_WIDTH // 2, 460, 300, 60)
     ]
     
     selected_index = 0
     buttons[selected_index].selected = True
     
     while running:
-        dt = clock.tick(60)
+        events = loop.events(STATIC)
+        dt = loop.dt
         mouse_pos = pygame.mouse.get_pos()
         
-        for event in pygame.event.get():
+        for event in events:
+            if devices.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -391,7 +334,17 @@ def settings_menu():
                             pygame.mixer.music.set_volume(0.7)
                             buttons[0].text = "Sound: ON"
                         play_sound("menu_select")
-                    elif selected_index == 1:  # Back
+                    elif selected_index == 1:  # Cycle the frame-rate cap
+                        index = FPS_CHOICES.index(governor.target_fps) if governor.target_fps in FPS_CHOICES else -1
+                        governor.target_fps = FPS_CHOICES[(index + 1) % len(FPS_CHOICES)]
+                        buttons[1].text = fps_label()
+                        play_sound("menu_select")
+                    elif selected_index == 2:  # Toggle vsync (needs a new display mode)
+                        governor.vsync = not governor.vsync
+                        screen = governor.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+                        buttons[2].text = vsync_label()
+                        play_sound("menu_select")
+                    elif selected_index == 3:  # Back
                         return
                 elif event.key == pygame.K_ESCAPE:
                     return
@@ -404,7 +357,7 @@ def settings_menu():
         screen.fill(GRAY)
         
         # Draw title
-        title_surface = menu_font.render("SETTINGS", True, WHITE)
+        title_surface = render_text(menu_font, "SETTINGS", WHITE)
         title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
         screen.blit(title_surface, title_rect)
         
@@ -412,7 +365,7 @@ def settings_menu():
         for button in buttons:
             button.draw(screen)
         
-        pygame.display.flip()
+        governor.present()
 
 def main():
     """Main entry point"""
@@ -1,7 +1,6 @@
 # multiplayer.py - Improved multiplayer mode with proper game loop
 import sys
 import pygame
-import random
 import os
 
 # Import game components
@@ -43,17 +42,42 @@ RED = (255, 0, 0)
 from sound_manager import load_game_sounds, play_sound, play_music, stop_music, ensure_music_playing
 
 
-# get_random_block function (ensure it's compatible with your Block class structure)
-def get_random_block_multiplayer(cell_size_param): # Renamed to avoid conflict if block.py also has one
-    from blocks import IBlock, OBlock, TBlock, SBlock, ZBlock, JBlock, LBlock # Assuming blocks.py exists
-    block_classes = [IBlock, OBlock, TBlock, SBlock, ZBlock, JBlock, LBlock]
-    chosen_block_class = random.choice(block_classes)
-    return chosen_block_class(cell_size_param) # Pass cell_size to block constructor
+from blocks import BLOCK_CLASSES
+from pieces import PieceQueue, new_seed
+from engine import LEFT, RIGHT, DOWN, ROTATE, DROP
+from timestep import FixedTimestep
+from pacing import IdleLoop, STATIC, governor
+from input_devices import devices
+from profiler import profiler
+from playfield import DirtyPlayfield
+from tiles import cell_tile, draw_cells
+from text_cache import render_text, get_font
+from replay import (ReplayRecorder, MODE_MULTI, RELEASE_LEFT, RELEASE_RIGHT, RELEASE_DOWN,
+                    HAT)
+
+# Keyboard bindings per player, mapped to input codes (see MultiplayerPlayer.handle_input)
+KEY_BINDINGS = {
+    1: {pygame.K_a: LEFT, pygame.K_d: RIGHT, pygame.K_s: DOWN, pygame.K_w: ROTATE, pygame.K_SPACE: DROP},
+    2: {pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT, pygame.K_DOWN: DOWN, pygame.K_UP: ROTATE,
+        pygame.K_RETURN: DROP},
+}
+KEY_RELEASES = {LEFT: RELEASE_LEFT, RIGHT: RELEASE_RIGHT, DOWN: RELEASE_DOWN}
+# Controller buttons: Triangle (3) rotates, X (0) hard drops
+BUTTON_BINDINGS = {3: ROTATE, 0: DROP}
+
+
+def make_block(piece_index, cell_size_param):
+    """Create the block for a piece index drawn from a pieces.PieceQueue"""
+    return BLOCK_CLASSES[piece_index](cell_size_param) # Pass cell_size to block constructor
 
 
 class MultiplayerPlayer: # Renamed to avoid clash with player.py's Player
-    def __init__(self, player_id, grid_width_cells=GRID_WIDTH, grid_height_cells=GRID_HEIGHT, cell_pixel_size=CELL_SIZE):
+    def __init__(self, player_id, grid_width_cells=GRID_WIDTH, grid_height_cells=GRID_HEIGHT, cell_pixel_size=CELL_SIZE,
+                 seed=None, piece_mode="uniform"):
         self.player_id = player_id
+        # Seeded piece source; players given the same seed get the same pieces
+        self.seed = new_seed() if seed is None else seed
+        self.piece_queue = PieceQueue(self.seed, piece_mode)
         self.grid = Grid(grid_width_cells, grid_height_cells, cell_pixel_size) # from grid.py
         self.current_block = None
         self.next_block = None
@@ -70,13 +94,23 @@ class MultiplayerPlayer: # Renamed to avoid clash with player.py's Player
         self.input_left_pressed = False
         self.input_right_pressed = False
         self.input_down_pressed = False
+        self.move_repeat_delay_ms = 120 # Auto-repeat delay for held directions
         
         # Fonts (can be passed in or initialized here)
-        self.font_panel_title = pygame.font.SysFont("Arial", 28, bold=True)
-        self.font_panel_info = pygame.font.SysFont("Arial", 22)
-        self.font_controls = pygame.font.SysFont("Arial", 16)
+        self.font_panel_title = get_font("Arial", 28, bold=True)
+        self.font_panel_info = get_font("Arial", 22)
+        self.font_controls = get_font("Arial", 16)
 
         self.cell_size = cell_pixel_size # Store cell_size for drawing next block
+
+        # Field renderer that only repaints changed cells, styled like Grid.draw + Block.draw
+        grid_colors = self.grid.colors
+        self.playfield = DirtyPlayfield(grid_width_cells, grid_height_cells, cell_pixel_size,
+                                        lambda value: grid_colors[min(value, len(grid_colors) - 1)],
+                                        gap_color=GRAY, empty_color=(30, 30, 30), line_color=(60, 60, 60),
+                                        piece_inset=1, piece_over_border=True)
+        self.piece_overlay_key = None  # Piece state the cached piece/ghost cell lists belong to
+        self.piece_cells = self.ghost_cells = ()
         
         self.spawn_new_block() # Initial current block
         self.spawn_new_block() # Initial next block (current becomes next, new next is generated)
@@ -86,28 +120,14 @@ class MultiplayerPlayer: # Renamed to avoid clash with player.py's Player
             self.current_block = self.next_block
         else:
             # This case should ideally only happen on first spawn if next_block wasn't pre-generated
-            self.current_block = get_random_block_multiplayer(self.cell_size) 
+            self.current_block = make_block(self.piece_queue.next(), self.cell_size)
         
-        self.next_block = get_random_block_multiplayer(self.cell_size) # from blocks.py
+        self.next_block = make_block(self.piece_queue.next(), self.cell_size) # from blocks.py
         
-        # Position new block at top-center of grid
-        # Assuming block.py's Block class has col_offset, row_offset, and is_valid_position
-        self.current_block.col_offset = self.grid.num_cols // 2 # Needs adjustment based on block width
-        # Adjust for block width:
-        if self.current_block.cells and 0 in self.current_block.cells: # Check if rotation 0 exists
-            current_shape_cells = self.current_block.cells[0]
-            if current_shape_cells: # Check if the shape has cells
-                 min_col = min(p.col for p in current_shape_cells)
-                 max_col = max(p.col for p in current_shape_cells)
-                 block_width_in_cells = max_col - min_col + 1
-                 self.current_block.col_offset = (self.grid.num_cols // 2) - (block_width_in_cells // 2) - min_col
-            else: # Fallback if shape is empty or malformed
-                 self.current_block.col_offset = self.grid.num_cols // 2 - 2 # Default centering for 4-cell wide blocks
-
-        else: # Fallback if cells[0] doesn't exist
-            self.current_block.col_offset = self.grid.num_cols // 2 - 2
-
-
+        # Position new block at top-center of grid, using the precomputed bounds of rotation 0
+        _, min_col, _, _ = self.current_block.bounds[0]
+        block_width_in_cells = self.current_block.widths[0]
+        self.current_block.col_offset = (self.grid.num_cols // 2) - (block_width_in_cells // 2) - min_col
         self.current_block.row_offset = 0 
         
         if not self.current_block.is_valid_position(self.grid):
@@ -115,6 +135,47 @@ class MultiplayerPlayer: # Renamed to avoid clash with player.py's Player
             play_sound("game_over")
             print(f"Player {self.player_id} game over on spawn.")
 
+    def reset_timers(self, tick):
+        """Start the gravity and auto-repeat timers at `tick` (game start)"""
+        self.last_drop_event_time = tick
+        self.last_move_event_time = tick
+
+    def handle_input(self, code, tick, flags=None):
+        """
+        Apply one input, given as a replay record code (engine action for
+        presses, replay.RELEASE_* for releases, replay.HAT with a flags byte).
+        Both the live event loop and the replay tool go through here.
+        """
+        if not self.active:
+            return
+        if code == LEFT:
+            self.input_left_pressed = True; self.attempt_move_horizontal(-1); self.last_move_event_time = tick
+        elif code == RIGHT:
+            self.input_right_pressed = True; self.attempt_move_horizontal(1); self.last_move_event_time = tick
+        elif code == DOWN:
+            self.input_down_pressed = True # Set flag, continuous handler will do action
+        elif code == ROTATE:
+            self.attempt_rotate()
+        elif code == DROP:
+            self.perform_hard_drop()
+        elif code == RELEASE_LEFT:
+            self.input_left_pressed = False
+        elif code == RELEASE_RIGHT:
+            self.input_right_pressed = False
+        elif code == RELEASE_DOWN:
+            self.input_down_pressed = False
+        elif code == HAT:
+            self.input_left_pressed = bool(flags & 1)
+            self.input_right_pressed = bool(flags & 2)
+            self.input_down_pressed = bool(flags & 4)
+            if flags: self.last_move_event_time = tick # Reset for new D-pad input (up included)
+
+    def run_tick(self, tick):
+        """Per-frame update: gravity, then held-direction auto-repeat"""
+        if self.active:
+            self.update_game_state(tick)
+            self.process_continuous_inputs(tick, self.move_repeat_delay_ms)
+
     def update_game_state(self, current_tick_time):
         if not self.active:
             return
@@ -160,9 +221,9 @@ class MultiplayerPlayer: # Renamed to avoid clash with player.py's Player
         if not self.active or not self.current_block:
             return
         
-        cells_dropped = 0
-        while self.current_block.move(1, 0, self.grid):
-            cells_dropped += 1
+        landing_row = self.grid.landing_row(self.current_block)
+        cells_dropped = landing_row - self.current_block.row_offset
+        self.current_block.row_offset = landing_row
         self.score += cells_dropped * 1 # Small score for hard drop cells
         self.lock_block_in_grid()
 
@@ -212,105 +273,72 @@ class MultiplayerPlayer: # Renamed to avoid clash with player.py's Player
         self.spawn_new_block() # Generate next piece
         return True
 
-    def draw_player_game_field(self, surface, top_left_x, top_left_y):
-        self.grid.draw(surface, top_left_x, top_left_y) # Grid handles its own drawing
-        if self.active and self.current_block:
-            self.current_block.draw(surface, top_left_x, top_left_y) # Block handles its own drawing relative to grid
-
-    def draw_player_info_panel(self, surface, top_left_x, top_left_y, panel_width, panel_height):
+    def render_game_field(self, surface, top_left_x, top_left_y):
+        """Repaint the field cells that changed since the last frame; returns the dirty rects"""
+        piece_cells = ghost_cells = ()
+        piece_color = None
+        block = self.current_block
+        if self.active and block:
+            landing = self.grid.landing_row(block)
+            # Rebuilt only when the piece moves (a still piece allocates nothing)
+            key = (block, block.rotation_state, block.row_offset, block.col_offset, landing)
+            if key != self.piece_overlay_key:
+                self.piece_overlay_key = key
+                self.piece_cells = block.get_cell_positions()
+                landing_shift = landing - block.row_offset
+                self.ghost_cells = [(r + landing_shift, c) for r, c in self.piece_cells]
+            piece_cells, ghost_cells = self.piece_cells, self.ghost_cells
+            piece_color = block.color
+        return self.playfield.render(surface, top_left_x, top_left_y, self.grid.grid,
+                                     piece_cells, piece_color, ghost_cells)
+
+    def panel_state(self):
+        """Everything the info panel shows; it is redrawn only when this changes"""
+        return (self.score, self.level, self.lines_cleared_total,
+                self.next_block.id if self.next_block else None)
+
+    def info_panel_rows(self, top_left_y):
+        """Top y of each row of the info panel (they only depend on font heights)"""
+        title_height = render_text(self.font_panel_title, f"Player {self.player_id}", WHITE).get_height()
+        info_height = self.font_panel_info.get_height()
+        rows = {}
+        current_y = top_left_y + INFO_PADDING
+        rows["title"] = current_y
+        current_y += title_height + INFO_PADDING * 2
+        rows["score"] = current_y
+        current_y += info_height + INFO_PADDING
+        rows["level"] = current_y
+        current_y += info_height + INFO_PADDING * 2
+        rows["lines"] = current_y
+        current_y += info_height + INFO_PADDING * 2
+        rows["next_label"] = current_y
+        current_y += info_height + INFO_PADDING // 2
+        rows["preview"] = current_y
+        current_y += PREVIEW_SIZE * self.cell_size + INFO_PADDING * 2
+        rows["controls"] = current_y
+        return rows
+
+    def draw_info_panel_background(self, surface, top_left_x, top_left_y, panel_width, panel_height):
+        """Static parts of the info panel: background, title, labels, preview box and controls"""
         panel_rect = pygame.Rect(top_left_x, top_left_y, panel_width, panel_height)
         pygame.draw.rect(surface, LIGHT_GRAY, panel_rect) # Panel background
         pygame.draw.rect(surface, WHITE, panel_rect, 2) # Panel border
-
-        current_y = top_left_y + INFO_PADDING
+        rows = self.info_panel_rows(top_left_y)
 
         # Player Title
-        title_surf = self.font_panel_title.render(f"Player {self.player_id}", True, WHITE)
-        title_rect = title_surf.get_rect(centerx=panel_rect.centerx, top=current_y)
+        title_surf = render_text(self.font_panel_title, f"Player {self.player_id}", WHITE)
+        title_rect = title_surf.get_rect(centerx=panel_rect.centerx, top=rows["title"])
         surface.blit(title_surf, title_rect)
-        current_y += title_surf.get_height() + INFO_PADDING * 2
-
-        # Score
-        score_surf = self.font_panel_info.render(f"Score: {self.score}", True, WHITE)
-        score_rect = score_surf.get_rect(left=panel_rect.left + INFO_PADDING, top=current_y)
-        surface.blit(score_surf, score_rect)
-        current_y += score_surf.get_height() + INFO_PADDING
-
-        # Level
-        level_surf = self.font_panel_info.render(f"Level: {self.level}", True, WHITE)
-        level_rect = level_surf.get_rect(left=panel_rect.left + INFO_PADDING, top=current_y)
-        surface.blit(level_surf, level_rect)
-        current_y += level_surf.get_height() + INFO_PADDING * 2
-        
-        # Lines Cleared
-        lines_surf = self.font_panel_info.render(f"Lines: {self.lines_cleared_total}", True, WHITE)
-        lines_rect = lines_surf.get_rect(left=panel_rect.left + INFO_PADDING, top=current_y)
-        surface.blit(lines_surf, lines_rect)
-        current_y += lines_surf.get_height() + INFO_PADDING * 2
 
-
-        # Next Piece Preview
-        next_label_surf = self.font_panel_info.render("Next:", True, WHITE)
-        next_label_rect = next_label_surf.get_rect(left=panel_rect.left + INFO_PADDING, top=current_y)
+        # Next Piece label and preview box
+        next_label_surf = render_text(self.font_panel_info, "Next:", WHITE)
+        next_label_rect = next_label_surf.get_rect(left=panel_rect.left + INFO_PADDING, top=rows["next_label"])
         surface.blit(next_label_surf, next_label_rect)
-        current_y += next_label_surf.get_height() + INFO_PADDING // 2
-
-        # Preview Box for Next Piece
-        preview_box_size_cells = PREVIEW_SIZE # e.g., 4x4 cells
-        preview_box_width_px = preview_box_size_cells * self.cell_size
-        preview_box_height_px = preview_box_size_cells * self.cell_size 
-        # Center preview box within the panel width if desired
-        preview_box_x = panel_rect.left + (panel_width - preview_box_width_px) // 2
-        preview_box_y = current_y
-        
-        pygame.draw.rect(surface, BLACK, (preview_box_x, preview_box_y, preview_box_width_px, preview_box_height_px)) # BG
-        pygame.draw.rect(surface, WHITE, (preview_box_x, preview_box_y, preview_box_width_px, preview_box_height_px), 1) # Border
-
-        if self.next_block:
-            # Temporarily adjust next_block's offsets for drawing in the small preview
-            original_row_offset = self.next_block.row_offset
-            original_col_offset = self.next_block.col_offset
-
-            # Get the actual cell data for the current rotation state of the next block
-            # Ensure rotation_state is valid for self.next_block.cells
-            current_rotation = self.next_block.rotation_state % len(self.next_block.cells)
-            shape_to_draw = self.next_block.cells[current_rotation]
-            
-            min_r = 0; min_c = 0; max_r = 0; max_c = 0
-            if shape_to_draw : # Check if shape_to_draw is not empty
-                min_r = min(p.row for p in shape_to_draw)
-                min_c = min(p.col for p in shape_to_draw)
-                max_r = max(p.row for p in shape_to_draw)
-                max_c = max(p.col for p in shape_to_draw)
-            else: # Handle empty shape
-                shape_to_draw = []
-
-
-            shape_height_cells = max_r - min_r + 1 if shape_to_draw else 0
-            shape_width_cells = max_c - min_c + 1 if shape_to_draw else 0
-
-            cell_offset_x = (preview_box_size_cells - shape_width_cells) // 2
-            cell_offset_y = (preview_box_size_cells - shape_height_cells) // 2
-            
-            for pos in shape_to_draw:
-                draw_c = pos.col - min_c + cell_offset_x
-                draw_r = pos.row - min_r + cell_offset_y
-                
-                if 0 <= draw_c < preview_box_size_cells and 0 <= draw_r < preview_box_size_cells:
-                    rect = pygame.Rect(
-                        preview_box_x + draw_c * self.cell_size + 1, 
-                        preview_box_y + draw_r * self.cell_size + 1, 
-                        self.cell_size -1, 
-                        self.cell_size -1  
-                    )
-                    pygame.draw.rect(surface, self.next_block.color, rect)
-
-            self.next_block.row_offset = original_row_offset
-            self.next_block.col_offset = original_col_offset
-        current_y += preview_box_height_px + INFO_PADDING * 2
+        self.draw_preview_box(surface, top_left_x, top_left_y, panel_width)
 
         # Controls (static text for now)
-        controls_title_surf = self.font_panel_info.render("Controls:", True, WHITE)
+        current_y = rows["controls"]
+        controls_title_surf = render_text(self.font_panel_info, "Controls:", WHITE)
         controls_title_rect = controls_title_surf.get_rect(left=panel_rect.left + INFO_PADDING, top=current_y)
         surface.blit(controls_title_surf, controls_title_rect)
         current_y += controls_title_surf.get_height() + INFO_PADDING // 2
@@ -322,42 +350,89 @@ class MultiplayerPlayer: # Renamed to avoid clash with player.py's Player
             control_texts = ["Up: Rotate", "Left, Right", "Down: Soft Drop", "Enter: Hard Drop"]
         
         for text in control_texts:
-            control_surf = self.font_controls.render(text, True, WHITE)
+            control_surf = render_text(self.font_controls, text, WHITE)
             control_rect = control_surf.get_rect(left=panel_rect.left + INFO_PADDING, top=current_y)
             surface.blit(control_surf, control_rect)
             current_y += control_surf.get_height() + 2 
 
+    def draw_preview_box(self, surface, top_left_x, top_left_y, panel_width):
+        """Empty next-piece preview box; returns its rect"""
+        preview_box_size_px = PREVIEW_SIZE * self.cell_size
+        # Center preview box within the panel width
+        preview_box = pygame.Rect(top_left_x + (panel_width - preview_box_size_px) // 2,
+                                  self.info_panel_rows(top_left_y)["preview"],
+                                  preview_box_size_px, preview_box_size_px)
+        pygame.draw.rect(surface, BLACK, preview_box) # BG
+        pygame.draw.rect(surface, WHITE, preview_box, 1) # Border
+        return preview_box
+
+    def draw_player_info_values(self, surface, top_left_x, top_left_y, panel_width, panel_height):
+        """Changing parts of the info panel, drawn over its background: score, level, lines and next piece"""
+        left = top_left_x + INFO_PADDING
+        rows = self.info_panel_rows(top_left_y)
+
+        score_surf = render_text(self.font_panel_info, f"Score: {self.score}", WHITE)
+        surface.blit(score_surf, score_surf.get_rect(left=left, top=rows["score"]))
+        level_surf = render_text(self.font_panel_info, f"Level: {self.level}", WHITE)
+        surface.blit(level_surf, level_surf.get_rect(left=left, top=rows["level"]))
+        lines_surf = render_text(self.font_panel_info, f"Lines: {self.lines_cleared_total}", WHITE)
+        surface.blit(lines_surf, lines_surf.get_rect(left=left, top=rows["lines"]))
+
+        # Next Piece Preview
+        preview_box = self.draw_preview_box(surface, top_left_x, top_left_y, panel_width)
+        if self.next_block:
+            # Center the shape using the block class's precomputed bounds
+            current_rotation = self.next_block.rotation_state
+            min_r, min_c, _, _ = self.next_block.bounds[current_rotation]
+            shape_height_cells = self.next_block.heights[current_rotation]
+            shape_width_cells = self.next_block.widths[current_rotation]
+
+            cell_offset_x = (PREVIEW_SIZE - shape_width_cells) // 2
+            cell_offset_y = (PREVIEW_SIZE - shape_height_cells) // 2
+            
+            tile = cell_tile(self.next_block.color, self.cell_size - 1)
+            cells = []
+            for r, c in self.next_block.offsets[current_rotation]:
+                draw_c = c - min_c + cell_offset_x
+                draw_r = r - min_r + cell_offset_y
+                if 0 <= draw_c < PREVIEW_SIZE and 0 <= draw_r < PREVIEW_SIZE:
+                    cells.append((tile, (preview_box.x + draw_c * self.cell_size + 1,
+                                         preview_box.y + draw_r * self.cell_size + 1)))
+            draw_cells(surface, cells)
 
 def draw_global_timer(surface, elapsed_ms, font, center_x, top_y):
     minutes = elapsed_ms // 60000
     seconds = (elapsed_ms % 60000) // 1000
     time_str = f"Time: {minutes:02d}:{seconds:02d}"
-    timer_surf = font.render(time_str, True, WHITE)
+    timer_surf = render_text(font, time_str, WHITE)
     timer_rect = timer_surf.get_rect(centerx=center_x, top=top_y)
     surface.blit(timer_surf, timer_rect)
 
 
 def show_multiplayer_end_screen(screen, winner_player_id, p1_score, p2_score, on_play_again, on_main_menu):
-    font_title = pygame.font.SysFont("Arial", 60, bold=True)
-    font_info = pygame.font.SysFont("Arial", 36)
-    font_button = pygame.font.SysFont("Arial", 40)
+    font_title = get_font("Arial", 60, bold=True)
+    font_info = get_font("Arial", 36)
+    font_button = get_font("Arial", 40)
 
     screen_width = screen.get_width()
     screen_height = screen.get_height()
     
     selected_option = 0 
-    
-    controller = None
-    if pygame.joystick.get_count() > 0:
-        try:
-            controller = pygame.joystick.Joystick(0) 
-            if not controller.get_init(): controller.init()
-        except pygame.error: controller = None
+
+    # Title and scores never change, so they are composed once into a layer
+    # (per window size) and the screen is only redrawn when the selection moves;
+    # between inputs the loop sleeps in pygame.event.wait
+    end_loop = IdleLoop()
+    background = None
+    shown_option = None
 
     running_end_screen = True
     while running_end_screen:
+        events = end_loop.events(STATIC)
         mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+        for event in events:
+            if devices.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 stop_music()
                 pygame.quit()
@@ -392,7 +467,8 @@ def show_multiplayer_end_screen(screen, winner_player_id, p1_score, p2_score, on
                     on_main_menu()
                     return
 
-            if controller :
+            controller = devices.controller(0)
+            if controller and devices.slot_of(event) == 0:
                 if event.type == pygame.JOYHATMOTION:
                     hat_x, hat_y = controller.get_hat(0)
                     if hat_y != 0: # Up or Down
@@ -407,47 +483,57 @@ def show_multiplayer_end_screen(screen, winner_player_id, p1_score, p2_score, on
                         return
 
 
-        screen.fill(GRAY) 
+        if background is None or background.get_size() != screen.get_size():
+            screen_width, screen_height = screen.get_size()
+            background = pygame.Surface((screen_width, screen_height)).convert()
+            background.fill(GRAY) 
 
-        winner_text_str = f"Player {winner_player_id} Wins!" if winner_player_id else "It's a Tie!"
-        title_surf = font_title.render(winner_text_str, True, WHITE)
-        title_rect = title_surf.get_rect(center=(screen_width // 2, screen_height // 4))
-        screen.blit(title_surf, title_rect)
+            winner_text_str = f"Player {winner_player_id} Wins!" if winner_player_id else "It's a Tie!"
+            title_surf = render_text(font_title, winner_text_str, WHITE)
+            title_rect = title_surf.get_rect(center=(screen_width // 2, screen_height // 4))
+            background.blit(title_surf, title_rect)
 
-        p1_score_surf = font_info.render(f"Player 1 Score: {p1_score}", True, WHITE)
-        p1_score_rect = p1_score_surf.get_rect(center=(screen_width // 2, title_rect.bottom + 50))
-        screen.blit(p1_score_surf, p1_score_rect)
+            p1_score_surf = render_text(font_info, f"Player 1 Score: {p1_score}", WHITE)
+            p1_score_rect = p1_score_surf.get_rect(center=(screen_width // 2, title_rect.bottom + 50))
+            background.blit(p1_score_surf, p1_score_rect)
 
-        p2_score_surf = font_info.render(f"Player 2 Score: {p2_score}", True, WHITE)
-        p2_score_rect = p2_score_surf.get_rect(center=(screen_width // 2, p1_score_rect.bottom + 20))
-        screen.blit(p2_score_surf, p2_score_rect)
+            p2_score_surf = render_text(font_info, f"Player 2 Score: {p2_score}", WHITE)
+            p2_score_rect = p2_score_surf.get_rect(center=(screen_width // 2, p1_score_rect.bottom + 20))
+            background.blit(p2_score_surf, p2_score_rect)
+            shown_option = None
 
-        play_again_color = RED if selected_option == 0 else WHITE
-        main_menu_color = RED if selected_option == 1 else WHITE
+        if selected_option != shown_option:
+            screen.blit(background, (0, 0))
 
-        # Define button rects for drawing and collision (already done for mouse)
-        play_again_button_rect = pygame.Rect(screen_width // 2 - 150, screen_height // 2 + 20, 300, 60)
-        main_menu_button_rect = pygame.Rect(screen_width // 2 - 150, screen_height // 2 + 100, 300, 60)
+            play_again_color = RED if selected_option == 0 else WHITE
+            main_menu_color = RED if selected_option == 1 else WHITE
 
-        # Draw button backgrounds
-        pygame.draw.rect(screen, LIGHT_GRAY if selected_option == 0 else GRAY, play_again_button_rect, border_radius=10)
-        pygame.draw.rect(screen, LIGHT_GRAY if selected_option == 1 else GRAY, main_menu_button_rect, border_radius=10)
-        
-        # Draw button text
-        play_again_surf = font_button.render("Play Again", True, play_again_color)
-        play_again_text_rect = play_again_surf.get_rect(center=play_again_button_rect.center)
-        screen.blit(play_again_surf, play_again_text_rect)
+            # Define button rects for drawing and collision (already done for mouse)
+            play_again_button_rect = pygame.Rect(screen_width // 2 - 150, screen_height // 2 + 20, 300, 60)
+            main_menu_button_rect = pygame.Rect(screen_width // 2 - 150, screen_height // 2 + 100, 300, 60)
 
-        main_menu_surf = font_button.render("Main Menu", True, main_menu_color)
-        main_menu_text_rect = main_menu_surf.get_rect(center=main_menu_button_rect.center)
-        screen.blit(main_menu_surf, main_menu_text_rect)
+            # Draw button backgrounds
+            pygame.draw.rect(screen, LIGHT_GRAY if selected_option == 0 else GRAY, play_again_button_rect, border_radius=10)
+            pygame.draw.rect(screen, LIGHT_GRAY if selected_option == 1 else GRAY, main_menu_button_rect, border_radius=10)
+            
+            # Draw button text
+            play_again_surf = render_text(font_button, "Play Again", play_again_color)
+            play_again_text_rect = play_again_surf.get_rect(center=play_again_button_rect.center)
+            screen.blit(play_again_surf, play_again_text_rect)
 
+            main_menu_surf = render_text(font_button, "Main Menu", main_menu_color)
+            main_menu_text_rect = main_menu_surf.get_rect(center=main_menu_button_rect.center)
+            screen.blit(main_menu_surf, main_menu_text_rect)
 
-        pygame.display.flip()
-        pygame.time.Clock().tick(30)
+            governor.present()
+            shown_option = selected_option
 
 
-def multiplayer_mode(): # Renamed from multiplayer_game_loop
+def multiplayer_mode(seed=None, piece_mode="uniform", clock=None): # Renamed from multiplayer_game_loop
+    """
+    Run a two-player match. Both players share one seed so they get the same pieces.
+    `clock` returns the time in ms (default pygame.time.get_ticks).
+    """
     pygame.init()
     if not pygame.mixer.get_init(): pygame.mixer.init()
     load_game_sounds()
@@ -467,13 +553,15 @@ def multiplayer_mode(): # Renamed from multiplayer_game_loop
                     PANEL_INFO_WIDTH * 2 +     
                     FIELD_MARGIN_HORIZONTAL)   
     
-    screen = pygame.display.set_mode((window_width, window_height))
+    screen = governor.set_mode((window_width, window_height))
     pygame.display.set_caption("Tetris - Multiplayer")
 
-    player1 = MultiplayerPlayer(1)
-    player2 = MultiplayerPlayer(2)
+    if seed is None:
+        seed = new_seed()
+    player1 = MultiplayerPlayer(1, seed=seed, piece_mode=piece_mode)
+    player2 = MultiplayerPlayer(2, seed=seed, piece_mode=piece_mode)
     
-    clock = pygame.time.Clock()
+    frame_clock = pygame.time.Clock()
     game_running = True
     continuous_move_delay_ms = 120 
 
@@ -488,107 +576,125 @@ def multiplayer_mode(): # Renamed from multiplayer_game_loop
     panel_common_y = p1_field_y
     panel_common_height = window_height - OUTER_MARGIN_VERTICAL * 2 - 30 
 
-    global_timer_font = pygame.font.SysFont("Arial", 24, bold=True)
-    game_start_time = pygame.time.get_ticks()
+    global_timer_font = get_font("Arial", 24, bold=True)
 
 
-    p1_controller = None
-    p2_controller = None
-    joystick_count = pygame.joystick.get_count()
-    if joystick_count > 0:
-        try:
-            p1_controller = pygame.joystick.Joystick(0)
-            if not p1_controller.get_init(): p1_controller.init()
-        except pygame.error: p1_controller = None
-    if joystick_count > 1:
-        try:
-            p2_controller = pygame.joystick.Joystick(1)
-            if not p2_controller.get_init(): p2_controller.init()
-        except pygame.error: p2_controller = None
+    # The players advance in fixed simulation steps of game time (ms since
+    # game start); the replay records inputs and every step against it
+    players = (player1, player2)
+    recorder = ReplayRecorder(MODE_MULTI, seed, piece_mode)
+    timestep = FixedTimestep(clock=clock or pygame.time.get_ticks)
+    game_time = 0
+    for player in players:
+        player.reset_timers(game_time)
 
+    def send_input(player_index, code, tick, flags=None):
+        player = players[player_index]
+        if not player.active:
+            return
+        recorder.record(tick, code, player_index, flags)
+        player.handle_input(code, tick, flags)
+
+    def finish_replay(tick):
+        recorder.finish(tick, [(p.score, p.grid.grid) for p in players])
+        recorder.save()
+
+    layout = ((player1, p1_field_x, p1_field_y, p1_panel_x),
+              (player2, p2_field_x, p2_field_y, p2_panel_x))
+    timer_rect = pygame.Rect(0, 0, 240, global_timer_font.get_height())
+    timer_rect.midtop = (window_width // 2, OUTER_MARGIN_VERTICAL // 2)
+    # Static layer: background fill and the fixed parts of both info panels
+    background = pygame.Surface((window_width, window_height)).convert()
+    background.fill(GRAY)
+    for player, _, _, panel_x in layout:
+        player.draw_info_panel_background(background, panel_x, panel_common_y, PANEL_INFO_WIDTH, panel_common_height)
+    full_redraw = True
+    panel_times = [0, 0]  # When each panel was last repainted; the governor may throttle it
 
     play_music() 
 
+    # Profiler overlay position (inside player 1's field, so only cells sit under it)
+    profiler_x, profiler_y = p1_field_x + 20, p1_field_y + 20
     while game_running:
-        current_tick = pygame.time.get_ticks()
+        profiler.begin_frame()
         ensure_music_playing() 
 
         for event in pygame.event.get():
+            if devices.handle_event(event) or profiler.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 game_running = False
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 game_running = False 
 
-            # --- Player 1 Input (Keyboard) ---
-            if player1.active:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_a: player1.input_left_pressed = True; player1.attempt_move_horizontal(-1); player1.last_move_event_time = current_tick
-                    elif event.key == pygame.K_d: player1.input_right_pressed = True; player1.attempt_move_horizontal(1); player1.last_move_event_time = current_tick
-                    elif event.key == pygame.K_s: player1.input_down_pressed = True; # Set flag, continuous handler will do action
-                    elif event.key == pygame.K_w: player1.attempt_rotate()
-                    elif event.key == pygame.K_SPACE: player1.perform_hard_drop()
-                elif event.type == pygame.KEYUP:
-                    if event.key == pygame.K_a: player1.input_left_pressed = False
-                    elif event.key == pygame.K_d: player1.input_right_pressed = False
-                    elif event.key == pygame.K_s: player1.input_down_pressed = False
-            
-            # --- Player 1 Input (Controller) ---
-            if player1.active and p1_controller:
-                if event.type == pygame.JOYBUTTONDOWN and event.instance_id == p1_controller.get_instance_id():
-                    if event.button == 3: player1.attempt_rotate() 
-                    elif event.button == 0: player1.perform_hard_drop() 
-                if event.type == pygame.JOYHATMOTION and event.instance_id == p1_controller.get_instance_id():
+            for player_index, player in enumerate(players):
+                # --- Keyboard Input ---
+                bindings = KEY_BINDINGS[player.player_id]
+                if event.type == pygame.KEYDOWN and event.key in bindings:
+                    send_input(player_index, bindings[event.key], game_time)
+                elif event.type == pygame.KEYUP and bindings.get(event.key) in KEY_RELEASES:
+                    send_input(player_index, KEY_RELEASES[bindings[event.key]], game_time)
+
+                # --- Controller Input (the pad in this player's slot) ---
+                if devices.slot_of(event) != player_index:
+                    continue
+                if event.type == pygame.JOYBUTTONDOWN and event.button in BUTTON_BINDINGS:
+                    send_input(player_index, BUTTON_BINDINGS[event.button], game_time)
+                if event.type == pygame.JOYHATMOTION:
                     hat_x, hat_y = event.value
-                    player1.input_left_pressed = (hat_x == -1)
-                    player1.input_right_pressed = (hat_x == 1)
-                    player1.input_down_pressed = (hat_y == -1)
-                    if hat_x !=0 or hat_y !=0 : player1.last_move_event_time = current_tick # Reset for new D-pad input
+                    flags = (hat_x == -1) | (hat_x == 1) << 1 | (hat_y == -1) << 2 | (hat_y == 1) << 3
+                    send_input(player_index, HAT, game_time, flags)
                 # Add JOYAXISMOTION if needed, similar to JOYHATMOTION for analog sticks
-
-
-            # --- Player 2 Input (Keyboard) ---
-            if player2.active:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT: player2.input_left_pressed = True; player2.attempt_move_horizontal(-1); player2.last_move_event_time = current_tick
-                    elif event.key == pygame.K_RIGHT: player2.input_right_pressed = True; player2.attempt_move_horizontal(1); player2.last_move_event_time = current_tick
-                    elif event.key == pygame.K_DOWN: player2.input_down_pressed = True; 
-                    elif event.key == pygame.K_UP: player2.attempt_rotate()
-                    elif event.key == pygame.K_RETURN: player2.perform_hard_drop() 
-                elif event.type == pygame.KEYUP:
-                    if event.key == pygame.K_LEFT: player2.input_left_pressed = False
-                    elif event.key == pygame.K_RIGHT: player2.input_right_pressed = False
-                    elif event.key == pygame.K_DOWN: player2.input_down_pressed = False
-
-            # --- Player 2 Input (Controller) ---
-            if player2.active and p2_controller:
-                if event.type == pygame.JOYBUTTONDOWN and event.instance_id == p2_controller.get_instance_id():
-                    if event.button == 3: player2.attempt_rotate() 
-                    elif event.button == 0: player2.perform_hard_drop()
-                if event.type == pygame.JOYHATMOTION and event.instance_id == p2_controller.get_instance_id():
-                    hat_x, hat_y = event.value
-                    player2.input_left_pressed = (hat_x == -1)
-                    player2.input_right_pressed = (hat_x == 1)
-                    player2.input_down_pressed = (hat_y == -1)
-                    if hat_x !=0 or hat_y !=0 : player2.last_move_event_time = current_tick
-
-
-        if player1.active:
-            player1.update_game_state(current_tick)
-            player1.process_continuous_inputs(current_tick, continuous_move_delay_ms)
-        if player2.active:
-            player2.update_game_state(current_tick)
-            player2.process_continuous_inputs(current_tick, continuous_move_delay_ms)
-
-        screen.fill(GRAY) 
-
-        player1.draw_player_game_field(screen, p1_field_x, p1_field_y)
-        player1.draw_player_info_panel(screen, p1_panel_x, panel_common_y, PANEL_INFO_WIDTH, panel_common_height)
-
-        player2.draw_player_game_field(screen, p2_field_x, p2_field_y)
-        player2.draw_player_info_panel(screen, p2_panel_x, panel_common_y, PANEL_INFO_WIDTH, panel_common_height)
-        
-        elapsed_time = current_tick - game_start_time
-        draw_global_timer(screen, elapsed_time, global_timer_font, window_width // 2, OUTER_MARGIN_VERTICAL // 2)
+        profiler.mark("events")
+
+        for _ in range(timestep.steps()):
+            game_time += timestep.step_ms
+            for player in players:
+                player.run_tick(game_time)
+            if not all(player.active for player in players):
+                break # Let the end-of-game check below run
+        profiler.mark("update")
+
+        # Repaint only what changed: field cells, panels whose contents
+        # changed and the timer once a second (everything on the first frame)
+        if full_redraw:
+            screen.blit(background, (0, 0))
+            for player in players:
+                player.playfield.invalidate()
+            shown_panels = [None, None]
+            shown_seconds = None
+            profiler.erase_rect()
+            profiler.mark("background")
+
+        stale = profiler.erase_rect()
+        if stale:
+            player1.playfield.invalidate_rect(stale)
+        dirty_rects = []
+        for player_index, (player, field_x, field_y, panel_x) in enumerate(layout):
+            dirty_rects += player.render_game_field(screen, field_x, field_y)
+            profiler.mark("render_game_field")
+            panel_state = player.panel_state()
+            if (panel_state != shown_panels[player_index] and (shown_panels[player_index] is None
+                    or pygame.time.get_ticks() - panel_times[player_index] >= governor.hud_interval_ms)):
+                panel_rect = pygame.Rect(panel_x, panel_common_y, PANEL_INFO_WIDTH, panel_common_height)
+                screen.blit(background, panel_rect, panel_rect)
+                player.draw_player_info_values(screen, panel_x, panel_common_y, PANEL_INFO_WIDTH, panel_common_height)
+                dirty_rects.append(panel_rect)
+                shown_panels[player_index] = panel_state
+                panel_times[player_index] = pygame.time.get_ticks()
+                profiler.mark("draw_player_info_values")
+
+        if game_time // 1000 != shown_seconds:
+            screen.blit(background, timer_rect, timer_rect)
+            draw_global_timer(screen, game_time, global_timer_font, window_width // 2, OUTER_MARGIN_VERTICAL // 2)
+            dirty_rects.append(timer_rect)
+            shown_seconds = game_time // 1000
+            profiler.mark("draw_global_timer")
+
+        profiler_rect = profiler.draw(screen, profiler_x, profiler_y)
+        if profiler_rect:
+            dirty_rects.append(profiler_rect)
+            profiler.mark("profiler")
 
 
         if not player1.active or not player2.active:
@@ -602,9 +708,10 @@ def multiplayer_mode(): # Renamed from multiplayer_game_loop
                 else: winner_id = None 
 
             stop_music() 
+            finish_replay(game_time)
             
             def play_again_action():
-                multiplayer_mode() # Call the renamed function
+                multiplayer_mode(piece_mode=piece_mode) # New seed for the rematch
             
             def main_menu_action():
                 # This is tricky. Ideally main.py's main_menu() is called.
@@ -619,10 +726,18 @@ def multiplayer_mode(): # Renamed from multiplayer_game_loop
             return 
 
 
-        pygame.display.flip()
-        clock.tick(60) 
+        if full_redraw:
+            governor.present()
+            full_redraw = False
+        elif dirty_rects:
+            governor.present(dirty_rects)
+        profiler.mark("display")
+        governor.tick(frame_clock)
+        profiler.mark("tick")
+        profiler.end_frame() 
 
     stop_music()
+    finish_replay(game_time)
     # When game_running becomes false due to ESCAPE or QUIT, this point is reached.
     # The main_menu() call is handled by main.py after this function returns.
 
@@ -0,0 +1,215 @@
+# pacing.py - Frame pacing for screens that mostly wait for input
+#
+# Menus, the pause overlay and the game-over screens used to tick at 60 fps
+# forever, polling events and redrawing a picture that hardly changes. An
+# IdleLoop runs such a screen at full rate while the player is using it and,
+# once no input has arrived for IDLE_AFTER_MS, blocks in pygame.event.wait:
+# screens with slow ambient animation (menu particles, the bobbing title)
+# drop to IDLE_FPS, static screens sleep until input or a heartbeat. Any
+# input event brings the screen straight back to full rate.
+#
+# Every loop paces its full-rate frames through the shared FrameGovernor
+# and shows them with governor.present(). It ticks at the target frame rate
+# chosen in the settings menu (or not at all when uncapped or when vsync
+# paces the flips), measures each frame's work up to the moment it is
+# presented (so time blocked on vsync or the frame cap never counts), and
+# sheds optional work while frames run over budget:
+# menu particles, alpha-blended overlays and glows, and how often the HUD is
+# repainted. The work comes back once frames have headroom again.
+
+import time
+
+import pygame
+
+# Loop modes, chosen by the caller every frame
+ACTIVE = "active"      # Always full rate (gameplay)
+ANIMATED = "animated"  # Something moves slowly; IDLE_FPS once idle
+STATIC = "static"      # Nothing moves; block until input once idle
+
+FULL_FPS = 60
+IDLE_FPS = 12
+
+# Time without input before a screen counts as idle
+IDLE_AFTER_MS = 2000
+
+# Longest a static screen sleeps, so periodic checks (music, controllers) still run
+IDLE_TIMEOUT_MS = 1000
+
+# Target frame rates offered in the settings menu; 0 means uncapped
+FPS_CHOICES = (30, 60, 120, 144, 0)
+
+# Quality levels the governor steps between
+QUALITY_LOW = 0
+QUALITY_MEDIUM = 1
+QUALITY_HIGH = 2
+
+# Per quality level: share of menu particles drawn, minimum ms between HUD
+# repaints, and whether alpha-blended overlays and glows are drawn
+PARTICLE_SHARE = (0.0, 0.5, 1.0)
+HUD_INTERVAL_MS = (500, 250, 0)
+ALPHA_EFFECTS = (False, True, True)
+
+# Frame work (excluding the wait for the next frame) as a share of the
+# budget: above OVER_BUDGET for ADAPT_FRAMES frames drops a quality level,
+# below UNDER_BUDGET for RESTORE_FRAMES frames raises one
+OVER_BUDGET = 0.9
+UNDER_BUDGET = 0.5
+ADAPT_FRAMES = 30
+RESTORE_FRAMES = 180
+
+# Weight of the newest frame in the moving average of frame work
+SMOOTHING = 0.1
+
+# Events that count as the player doing something
+INPUT_EVENTS = frozenset((
+    pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP,
+    pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL,
+    pygame.JOYAXISMOTION, pygame.JOYBALLMOTION, pygame.JOYHATMOTION,
+    pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP,
+    pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED,
+))
+
+
+class FrameGovernor:
+    """
+    Paces frames to `target_fps` (0 = uncapped) and adapts `quality` to the
+    frame budget. With `vsync` on, the display flip does the pacing.
+    """
+
+    def __init__(self, target_fps=FULL_FPS, clock=time.perf_counter):
+        self.target_fps = target_fps
+        self.vsync = False
+        self.quality = QUALITY_HIGH
+        self.average_ms = 0.0
+        self.streak = 0  # Frames in a row over (negative) or well under (positive) budget
+        self.clock = clock
+        self.frame_start = None  # When the current frame's work began
+        self.presented = None  # When it was handed to the display, if it was
+
+    @property
+    def budget_ms(self):
+        """Time one frame may take; uncapped and vsync modes still aim for FULL_FPS"""
+        return 1000 / (self.target_fps or FULL_FPS)
+
+    def begin_frame(self):
+        """Start timing a frame's work (tick does this after its wait)"""
+        self.frame_start = self.clock()
+        self.presented = None
+
+    def present(self, rects=None):
+        """Show the frame: update `rects`, or flip the whole display when None"""
+        self.presented = self.clock()
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def tick(self, clock, fps=None):
+        """
+        Account the frame's work, wait for the next frame on a pygame Clock and
+        return the ms since the previous one. `fps` overrides the target
+        (e.g. a fixed-rate screen).
+        """
+        if self.frame_start is not None:
+            work_end = self.clock() if self.presented is None else self.presented
+            self.record((work_end - self.frame_start) * 1000)
+        fps = fps or self.target_fps
+        dt = clock.tick() if self.vsync or not fps else clock.tick(fps)
+        self.begin_frame()
+        return dt
+
+    def record(self, work_ms):
+        """Account one frame's work and step the quality level if it stays off budget"""
+        self.average_ms += (work_ms - self.average_ms) * SMOOTHING
+        budget = self.budget_ms
+        if self.average_ms > budget * OVER_BUDGET:
+            self.streak = min(self.streak, 0) - 1
+        elif self.average_ms < budget * UNDER_BUDGET:
+            self.streak = max(self.streak, 0) + 1
+        else:
+            self.streak = 0
+        if self.streak <= -ADAPT_FRAMES and self.quality > QUALITY_LOW:
+            self.quality -= 1
+            self.streak = 0
+        elif self.streak >= RESTORE_FRAMES and self.quality < QUALITY_HIGH:
+            self.quality += 1
+            self.streak = 0
+
+    def particle_count(self, total):
+        """How many of `total` background particles to animate"""
+        return int(total * PARTICLE_SHARE[self.quality])
+
+    @property
+    def hud_interval_ms(self):
+        return HUD_INTERVAL_MS[self.quality]
+
+    @property
+    def alpha_effects(self):
+        return ALPHA_EFFECTS[self.quality]
+
+    def set_mode(self, size, flags=0):
+        """pygame.display.set_mode, with vsync when it is on and the platform allows it"""
+        if self.vsync:
+            try:
+                return pygame.display.set_mode(size, flags | pygame.SCALED, vsync=1)
+            except pygame.error as error:
+                print(f"VSync unavailable ({error}); using the frame cap instead")
+                self.vsync = False
+        return pygame.display.set_mode(size, flags)
+
+
+# Shared by every screen
+governor = FrameGovernor()
+
+
+class IdleLoop:
+    """
+    Replaces the `clock.tick(fps)` + `pygame.event.get()` pair of a screen loop.
+
+    Call `events(mode)` once per frame: it waits until the next frame is due
+    and returns that frame's events. Full-rate frames run at `fps`, or at the
+    governor's target when it is None. `dt` holds the ms since the previous
+    frame, so animations should scale by it rather than count frames.
+    """
+
+    def __init__(self, fps=None, idle_fps=IDLE_FPS, idle_after_ms=IDLE_AFTER_MS,
+                 idle_timeout_ms=IDLE_TIMEOUT_MS):
+        self.fps = fps
+        self.idle_frame_ms = 1000 // idle_fps
+        self.idle_after_ms = idle_after_ms
+        self.idle_timeout_ms = idle_timeout_ms
+        self.clock = pygame.time.Clock()
+        self.last_input = pygame.time.get_ticks()
+        self.dt = 0
+        self.frame_start = self.last_input
+
+    def wake(self):
+        """Back to full rate, as if the player had just pressed something"""
+        self.last_input = pygame.time.get_ticks()
+
+    @property
+    def idle(self):
+        return pygame.time.get_ticks() - self.last_input >= self.idle_after_ms
+
+    def events(self, mode=ANIMATED):
+        """Wait for the next frame in `mode` and return its events"""
+        if mode == ACTIVE or not self.idle:
+            self.dt = governor.tick(self.clock, self.fps)
+            events = pygame.event.get()
+        else:
+            if mode == ANIMATED:
+                # Sleep for whatever is left of the low-rate frame
+                timeout = self.idle_frame_ms - (pygame.time.get_ticks() - self.frame_start)
+            else:
+                timeout = self.idle_timeout_ms
+            event = pygame.event.wait(max(1, timeout))
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+            self.dt = self.clock.tick()
+            governor.begin_frame()  # The sleep is not frame work
+        self.frame_start = pygame.time.get_ticks()
+        for event in events:
+            if event.type in INPUT_EVENTS:
+                self.wake()
+                break
+        return events
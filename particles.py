@@ -0,0 +1,126 @@
+# particles.py - Background particles for the menus
+#
+# The main menu drifts a field of small translucent dots across the screen.
+# With NumPy available the field lives in arrays (position, velocity, radius,
+# alpha) and each frame moves every particle in one vectorized step; the
+# dots are pre-rendered sprites (tiles.particle_sprite) handed to
+# Surface.blits() in one batch. Without NumPy the same field is kept as
+# Particle objects and updated one by one, still drawn with one blits call.
+#
+# Alpha is quantized to ALPHA_LEVELS steps so a handful of sprites covers
+# every particle. Both versions take a `count` so the frame governor can
+# thin the field out when frames run long.
+
+import random
+
+from tiles import particle_sprite
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PARTICLE_COLORS = [(0, 255, 255), (255, 255, 0), (255, 0, 255), (0, 255, 0),
+                   (255, 0, 0), (0, 0, 255), (255, 165, 0)]
+
+RADII = (1, 3)        # Smallest and largest radius
+ALPHAS = (50, 200)    # Faintest and strongest alpha
+ALPHA_LEVELS = 8
+
+# Speed range per axis, in pixels per 60 fps frame
+MAX_SPEED = 0.5
+
+
+def quantize_alpha(alpha):
+    """Snap `alpha` to the nearest of ALPHA_LEVELS evenly spaced values"""
+    low, high = ALPHAS
+    step = (high - low) / (ALPHA_LEVELS - 1)
+    return int(low + round((alpha - low) / step) * step)
+
+
+class Particle:
+    """One background particle (used when NumPy is not installed)"""
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.x = random.randint(0, width)
+        self.y = random.randint(0, height)
+        self.vx = random.uniform(-MAX_SPEED, MAX_SPEED)
+        self.vy = random.uniform(-MAX_SPEED, MAX_SPEED)
+        self.size = random.randint(*RADII)
+        self.color = random.choice(PARTICLE_COLORS)
+        self.alpha = random.randint(*ALPHAS)
+        self.sprite = particle_sprite(self.color, self.size, quantize_alpha(self.alpha))
+
+    def update(self, dt=1000 / 60):
+        # Velocities are per 60 fps frame; scale by dt so idle-rate frames move as far
+        steps = dt * 60 / 1000
+        self.x += self.vx * steps
+        self.y += self.vy * steps
+
+        # Wrap around screen
+        if self.x < 0:
+            self.x = self.width
+        elif self.x > self.width:
+            self.x = 0
+        if self.y < 0:
+            self.y = self.height
+        elif self.y > self.height:
+            self.y = 0
+
+    def draw(self, surface):
+        surface.blit(self.sprite, (int(self.x) - self.size, int(self.y) - self.size))
+
+
+class ParticleList:
+    """The particle field as Particle objects"""
+
+    def __init__(self, count, width, height):
+        self.particles = [Particle(width, height) for _ in range(count)]
+
+    def __len__(self):
+        return len(self.particles)
+
+    def update(self, dt=1000 / 60, count=None):
+        for particle in self.particles[:count]:
+            particle.update(dt)
+
+    def draw(self, surface, count=None):
+        surface.blits([(p.sprite, (int(p.x) - p.size, int(p.y) - p.size)) for p in self.particles[:count]],
+                      doreturn=False)
+
+
+class ParticleField:
+    """The particle field as NumPy arrays, updated in one step per frame"""
+
+    def __init__(self, count, width, height, seed=None):
+        rng = np.random.default_rng(seed)
+        self.bounds = np.array([width, height], dtype=np.float64)
+        self.position = rng.uniform(0, 1, (count, 2)) * self.bounds
+        self.velocity = rng.uniform(-MAX_SPEED, MAX_SPEED, (count, 2))
+        self.size = rng.integers(RADII[0], RADII[1] + 1, count)
+        self.alpha = rng.integers(ALPHAS[0], ALPHAS[1] + 1, count)
+        colors = rng.integers(0, len(PARTICLE_COLORS), count)
+        self.sprites = [particle_sprite(PARTICLE_COLORS[color], int(size), quantize_alpha(alpha))
+                        for color, size, alpha in zip(colors, self.size, self.alpha)]
+        self.offset = self.size[:, None]  # Sprite top-left is the centre minus the radius
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def update(self, dt=1000 / 60, count=None):
+        # Velocities are per 60 fps frame; scale by dt so idle-rate frames move as far
+        position = self.position[:count]
+        position += self.velocity[:count] * (dt * 60 / 1000)
+        np.mod(position, self.bounds, out=position)
+
+    def draw(self, surface, count=None):
+        corners = (self.position[:count].astype(np.int32) - self.offset[:count]).tolist()
+        surface.blits(zip(self.sprites, corners), doreturn=False)
+
+
+def make_particles(count, width, height):
+    """A particle field of `count` particles, vectorized when NumPy is available"""
+    if np is not None:
+        return ParticleField(count, width, height)
+    return ParticleList(count, width, height)
@@ -0,0 +1,70 @@
+# pieces.py - Seedable piece sources
+#
+# Pieces are identified by their index 0..6 in the shared order
+# I, O, T, S, Z, J, L (engine.SHAPES and blocks.BLOCK_CLASSES).
+
+import random
+from collections import deque
+from itertools import islice
+
+NUM_PIECES = 7
+PIECE_MODES = ("uniform", "bag")
+
+
+def new_seed():
+    """Pick a fresh random seed so an unseeded game can still be reproduced"""
+    return random.randrange(2 ** 32)
+
+
+def piece_stream(seed=None, mode="uniform"):
+    """
+    Lazily yield an endless stream of piece indices.
+
+    - "uniform": every piece is drawn independently (the classic behaviour).
+    - "bag": 7-bag randomizer; each run of 7 pieces is a shuffled full set.
+
+    The same (seed, mode) always yields the same sequence.
+    """
+    rng = random.Random(seed)
+    if mode == "uniform":
+        while True:
+            yield rng.randint(0, NUM_PIECES - 1)
+    elif mode == "bag":
+        bag = list(range(NUM_PIECES))
+        while True:
+            rng.shuffle(bag)
+            yield from bag
+    else:
+        raise ValueError(f"Unknown piece mode '{mode}', expected one of {PIECE_MODES}")
+
+
+class PieceQueue:
+    """
+    A piece stream with an N-piece preview window.
+
+    `next()` returns the next piece and refills the window; `peek()` shows
+    the upcoming pieces without consuming them.
+    """
+
+    def __init__(self, seed=None, mode="uniform", preview=1):
+        self.seed = seed
+        self.mode = mode
+        self._stream = piece_stream(seed, mode)
+        self._preview = deque(islice(self._stream, preview))
+
+    def next(self):
+        """Take the next piece and draw one more into the preview"""
+        self._preview.append(next(self._stream))
+        return self._preview.popleft()
+
+    def peek(self, count=None):
+        """The next `count` pieces (default: the whole preview)"""
+        if count is None:
+            return tuple(self._preview)
+        return tuple(islice(self._preview, count))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.next()
@@ -0,0 +1,155 @@
+# placements.py - Enumerate every reachable final placement of a piece
+#
+# Used by bots, hints and analysis. A piece state is (rotation, col, row),
+# with col/row the top-left of its shape as in the engine (piece_x, piece_y)
+# and in Block (col_offset, row_offset). From the start state the piece may
+# move left, right, down or rotate clockwise to the next state, with no wall
+# kicks, exactly like TetrisEngine.rotate_piece and Block.rotate. A final
+# placement is a reachable state that cannot move down.
+#
+# The search is a BFS over (rotation, col) nodes where each node holds a
+# bitmask of reachable rows, so one integer operation handles a whole column
+# of states. Visited rows are memoized per node, so every state is expanded once.
+
+from collections import namedtuple
+
+from engine import PIECE_CELLS
+
+# `board` is the grid after the piece locks and full lines are cleared
+Placement = namedtuple("Placement", ["rotation", "col", "row", "lines", "board"])
+
+
+def engine_shapes(piece_index):
+    """Cell offsets (row, col) for the 4 rotations of an engine piece (engine.PIECE_CELLS)"""
+    return PIECE_CELLS[piece_index]
+
+
+def _fall(bits, free):
+    """Extend reachable rows downward through free rows"""
+    while True:
+        extended = bits | ((bits << 1) & free)
+        if extended == bits:
+            return bits
+        bits = extended
+
+
+def _free_rows(board, shapes):
+    """
+    For each rotation, {col: bitmask} where bit `row` is set if the shape fits
+    with its top-left at (row, col). Built from per-column occupancy bitboards.
+    """
+    height = len(board)
+    width = len(board[0])
+    columns = [0] * width
+    for y, row in enumerate(board):
+        bit = 1 << y
+        for x, cell in enumerate(row):
+            if cell:
+                columns[x] |= bit
+
+    free = []
+    for cells in shapes:
+        max_row = max(r for r, _ in cells)
+        min_col = min(c for _, c in cells)
+        max_col = max(c for _, c in cells)
+        in_bounds = (1 << (height - max_row)) - 1
+        by_col = {}
+        for x in range(-min_col, width - max_col):
+            blocked = 0
+            for r, c in cells:
+                blocked |= columns[x + c] >> r
+            by_col[x] = in_bounds & ~blocked
+        free.append(by_col)
+    return free
+
+
+def _place(board, cells, col, row, value):
+    """
+    Lock the cells into a new board and clear full lines; returns (lines, board).
+    Only the rows the piece touches are copied; the others are shared with `board`.
+    """
+    new_board = board[:]
+    touched = sorted({row + r for r, _ in cells})
+    for y in touched:
+        new_board[y] = new_board[y][:]
+    for r, c in cells:
+        new_board[row + r][col + c] = value
+    full = [y for y in touched if all(new_board[y])]
+    for y in reversed(full):
+        del new_board[y]
+    if full:
+        width = len(board[0])
+        new_board[0:0] = [[0] * width for _ in full]
+    return len(full), new_board
+
+
+def enumerate_placements(board, shapes, start=(0, 0, 0), value=1):
+    """
+    Return every distinct final placement reachable from `start`.
+
+    - `board`: list of rows of cell values (0 = empty), e.g. engine.grid.
+    - `shapes`: cell offsets per rotation (engine_shapes(i) or a Block's offsets).
+    - `start`: (rotation, col, row) of the piece.
+    - `value`: cell value written for the piece in the resulting boards.
+
+    Placements covering the same cells (e.g. O rotations) are reported once.
+    Resulting boards share unchanged rows with `board`; copy before mutating.
+    """
+    num_rotations = len(shapes)
+    free = _free_rows(board, shapes)
+    rotation, col, row = start
+    if row < 0 or not (free[rotation].get(col, 0) >> row) & 1:
+        return []
+
+    reach = [dict.fromkeys(by_col, 0) for by_col in free]
+    reach[rotation][col] = _fall(1 << row, free[rotation][col])
+    pending = [(rotation, col)]
+    while pending:
+        rotation, col = pending.pop()
+        bits = reach[rotation][col]
+        for next_rotation, next_col in ((rotation, col - 1), (rotation, col + 1),
+                                        ((rotation + 1) % num_rotations, col)):
+            next_free = free[next_rotation].get(next_col)
+            if not next_free:
+                continue
+            seen = reach[next_rotation][next_col]
+            new = bits & next_free & ~seen
+            if new:
+                reach[next_rotation][next_col] = _fall(seen | new, next_free)
+                pending.append((next_rotation, next_col))
+
+    # A footprint is the set of covered cells as one int (bit (row + 1) * width + col)
+    width = len(board[0])
+    placements = []
+    footprints = set()
+    for rotation, by_col in enumerate(reach):
+        cells = shapes[rotation]
+        pattern = sum(1 << (r * width + c) for r, c in cells)
+        for col, bits in by_col.items():
+            # Rows the piece can reach but cannot move down from
+            landed = bits & ~(free[rotation][col] >> 1)
+            while landed:
+                low = landed & -landed
+                landed ^= low
+                row = low.bit_length() - 1
+                footprint = pattern << ((row + 1) * width + col)
+                if footprint in footprints:
+                    continue
+                footprints.add(footprint)
+                lines, new_board = _place(board, cells, col, row, value)
+                placements.append(Placement(rotation, col, row, lines, new_board))
+    return placements
+
+
+def engine_placements(engine):
+    """Placements of a TetrisEngine's current piece from its current state"""
+    return enumerate_placements(engine.grid, engine_shapes(engine.color_index),
+                                (engine.rotation, engine.piece_x, engine.piece_y),
+                                engine.color_index + 1)
+
+
+def block_placements(grid, block):
+    """Placements of a multiplayer Block on a grid.Grid from its current state"""
+    return enumerate_placements(grid.grid, block.offsets,
+                                (block.rotation_state, block.col_offset, block.row_offset),
+                                block.id)
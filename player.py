@@ -1,5 +1,7 @@
 import pygame
 from constants import *
+from tiles import cell_tile, draw_cells
+from text_cache import render_text, get_font
 
 class Player:
     def __init__(self):
@@ -11,28 +13,27 @@ class Player:
     def draw_playfield(self, surf, x, y):
         pygame.draw.rect(surf, (0,0,0), (x, y, FIELD_PIX_W, FIELD_PIX_H))
         pygame.draw.rect(surf, (255,255,255), (x, y, FIELD_PIX_W, FIELD_PIX_H), 2)
+        cells = []
         for row in range(PLAYFIELD_H):
             for col in range(PLAYFIELD_W):
                 val = self.field[row][col]
                 if val:
-                    pygame.draw.rect(
-                        surf, val,
-                        (x + col*CELL_SIZE, y + row*CELL_SIZE, CELL_SIZE-1, CELL_SIZE-1)
-                    )
+                    cells.append((cell_tile(tuple(val), CELL_SIZE-1), (x + col*CELL_SIZE, y + row*CELL_SIZE)))
+        draw_cells(surf, cells)
 
     def draw_score_panel(self, surf, x, y, score, level):
         panel_h = 3*CELL_SIZE + PADDING*2
         pygame.draw.rect(surf, (180,180,180), (x, y, INFO_PIX_W, panel_h))
         pygame.draw.rect(surf, (255,255,255), (x, y, INFO_PIX_W, panel_h), 2)
-        font = pygame.font.SysFont("Arial", 22, bold=True)
-        surf.blit(font.render("Score", True, (0,0,0)), (x+PADDING, y+PADDING))
-        surf.blit(font.render(str(score), True, (0,0,0)), (x+PADDING, y+PADDING+CELL_SIZE))
-        surf.blit(font.render("Level", True, (0,0,0)), (x+INFO_PIX_W//2, y+PADDING))
-        surf.blit(font.render(str(level), True, (0,0,0)), (x+INFO_PIX_W//2, y+PADDING+CELL_SIZE))
+        font = get_font("Arial", 22, bold=True)
+        surf.blit(render_text(font, "Score", (0,0,0)), (x+PADDING, y+PADDING))
+        surf.blit(render_text(font, str(score), (0,0,0)), (x+PADDING, y+PADDING+CELL_SIZE))
+        surf.blit(render_text(font, "Level", (0,0,0)), (x+INFO_PIX_W//2, y+PADDING))
+        surf.blit(render_text(font, str(level), (0,0,0)), (x+INFO_PIX_W//2, y+PADDING+CELL_SIZE))
 
     def draw_next_piece(self, surf, x, y):
-        font = pygame.font.SysFont("Arial", 20, bold=True)
-        surf.blit(font.render("Next:", True, (0,0,0)), (x, y))
+        font = get_font("Arial", 20, bold=True)
+        surf.blit(render_text(font, "Next:", (0,0,0)), (x, y))
         box_y = y + font.get_height() + PADDING
         box_size = 4 * CELL_SIZE
         pygame.draw.rect(surf, (120,120,120), (x, box_y, box_size, box_size))
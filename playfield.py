@@ -0,0 +1,161 @@
+# playfield.py - Dirty-rectangle playfield renderer
+#
+# Remembers what every cell looked like on the previous frame and repaints
+# only the cells whose contents changed: the falling piece's old and new
+# footprint, its ghost, locked cells and rows moved by a line clear. The
+# returned rects are meant for pygame.display.update(rects), so a frame in
+# which the piece does not move costs a few list comparisons and no drawing.
+# Each distinct cell look is composed once into a tile and the changed cells
+# of a frame go to the screen in a single Surface.blits() call.
+
+import pygame
+
+from tiles import cell_tile, outline_tile, draw_cells
+
+# Overlay kinds drawn over board cells (board cells are plain int values)
+PIECE = "piece"
+GHOST = "ghost"
+
+
+class DirtyPlayfield:
+    """
+    Incremental renderer for a board of `num_cols` x `num_rows` cells.
+
+    - `cell_color(value)`: color of a locked cell value.
+    - `gap_color`: what shows between cells (the field background).
+    - `empty_color`: fill for empty cells, or None to leave the gap color.
+    - `line_color`: 1px outline drawn on board cells, or None.
+    - `piece_inset`: pixel shift of the falling piece and ghost inside a cell.
+    - `border_color`: 2px frame around the field.
+    - `piece_over_border`: draw the piece and ghost over the frame instead of under it.
+    - `bevel`: shade the edges of filled cells.
+    """
+
+    def __init__(self, num_cols, num_rows, cell_size, cell_color, gap_color=(0, 0, 0),
+                 empty_color=None, line_color=None, piece_inset=0, border_color=(255, 255, 255),
+                 piece_over_border=False, bevel=False):
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.cell_size = cell_size
+        self.cell_color = cell_color
+        self.gap_color = gap_color
+        self.empty_color = empty_color
+        self.line_color = line_color
+        self.piece_inset = piece_inset
+        self.border_color = border_color
+        self.piece_over_border = piece_over_border
+        self.bevel = bevel
+        self.tiles = {}  # Cell contents -> composed size x size tile
+        self.origin = None
+        self.shown = None  # Cell contents per row as last drawn; None forces a full repaint
+        self.overlay = {}  # Row -> {col: (kind, color)} for the piece and ghost
+        self.overlay_piece = self.overlay_ghost = self.overlay_color = None
+        self.batch = []  # (tile, position) pairs of the frame being drawn, reused
+
+    def invalidate(self):
+        """Repaint the whole field on the next render (e.g. after the screen was cleared)"""
+        self.shown = None
+
+    def invalidate_rect(self, rect):
+        """Repaint the cells under a screen `rect` on the next render (e.g. after an overlay covered them)"""
+        if self.shown is None:
+            return
+        x, y = self.origin
+        size = self.cell_size
+        first_col = max(0, (rect.left - x) // size)
+        last_col = min(self.num_cols - 1, (rect.right - 1 - x) // size)
+        for r in range(max(0, (rect.top - y) // size), min(self.num_rows - 1, (rect.bottom - 1 - y) // size) + 1):
+            self.shown[r][first_col:last_col + 1] = [None] * (last_col - first_col + 1)
+
+    def set_overlay(self, piece_cells, piece_color, ghost_cells):
+        """
+        Map the piece and ghost cells to {row: {col: (kind, color)}}. The map
+        is only rebuilt when the caller passes different cell sequences, so
+        callers that keep their lists while the piece is still allocate nothing.
+        """
+        if (piece_cells is self.overlay_piece and ghost_cells is self.overlay_ghost
+                and piece_color == self.overlay_color):
+            return
+        self.overlay_piece, self.overlay_ghost, self.overlay_color = piece_cells, ghost_cells, piece_color
+        overlay = {}
+        for kind, cells in ((GHOST, ghost_cells), (PIECE, piece_cells)):
+            token = (kind, piece_color)
+            for r, c in cells:
+                if 0 <= r < self.num_rows and 0 <= c < self.num_cols:
+                    overlay.setdefault(r, {})[c] = token
+        self.overlay = overlay
+
+    def render(self, surface, x, y, board, piece_cells=(), piece_color=None, ghost_cells=()):
+        """
+        Bring the field at (x, y) up to date and return the screen rects that
+        changed. `piece_cells` and `ghost_cells` are (row, col) board positions.
+        """
+        self.set_overlay(piece_cells, piece_color, ghost_cells)
+        overlay = self.overlay
+        size = self.cell_size
+        num_cols = self.num_cols
+
+        full = self.shown is None or self.origin[0] != x or self.origin[1] != y
+        if full:
+            self.origin = (x, y)
+            self.shown = [[None] * num_cols for _ in range(self.num_rows)]
+
+        tiles = self.tiles
+        batch = self.batch
+        edge = False
+        for r in range(self.num_rows):
+            row = board[r]
+            shown = self.shown[r]
+            marks = overlay.get(r)
+            if marks is None and row == shown:
+                continue
+            for c in range(num_cols):
+                cell = row[c] if marks is None else marks.get(c, row[c])
+                if cell != shown[c]:
+                    tile = tiles.get(cell)
+                    if tile is None:
+                        tile = tiles[cell] = self.compose_tile(cell)
+                    batch.append((tile, (x + c * size, y + r * size)))
+                    shown[c] = cell
+                    if r == 0 or c == 0 or r == self.num_rows - 1 or c == num_cols - 1:
+                        edge = True
+        if not batch and not full:
+            return []
+        draw_cells(surface, batch)
+
+        field_rect = pygame.Rect(x, y, num_cols * size, self.num_rows * size)
+        if edge or full:
+            pygame.draw.rect(surface, self.border_color, field_rect, 2)
+            if self.piece_over_border:
+                inset = self.piece_inset
+                draw_cells(surface, [(self.overlay_tile(token), (x + c * size + inset, y + r * size + inset))
+                                     for r, marks in overlay.items() for c, token in marks.items()])
+        rects = [field_rect] if full else [pygame.Rect(pos, (size, size)) for _, pos in batch]
+        batch.clear()
+        return rects
+
+    def overlay_tile(self, overlay):
+        """Tile for a (kind, color) piece or ghost cell"""
+        kind, color = overlay
+        if kind == GHOST:
+            return outline_tile(color, self.cell_size - 1)
+        return cell_tile(color, self.cell_size - 1, bevel=self.bevel)
+
+    def compose_tile(self, cell):
+        """Render one cell's contents into a size x size tile"""
+        size = self.cell_size
+        tile = pygame.Surface((size, size))
+        tile.fill(self.gap_color)
+        overlay = None
+        if type(cell) is tuple:
+            # The piece and ghost only ever cover empty cells
+            overlay = cell
+            cell = 0
+        color = self.cell_color(cell) if cell else self.empty_color
+        if color is not None:
+            tile.blit(cell_tile(color, size - 1, self.line_color, self.bevel and cell != 0), (0, 0))
+        elif self.line_color is not None:
+            pygame.draw.rect(tile, self.line_color, (0, 0, size - 1, size - 1), 1)
+        if overlay:
+            tile.blit(self.overlay_tile(overlay), (self.piece_inset, self.piece_inset))
+        return tile.convert() if pygame.display.get_surface() is not None else tile
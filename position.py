@@ -1,4 +1,4 @@
-class Position:
-    def __init__(self,row,col):
-        self.row = row
-        self.col = col
\ No newline at end of file
+from collections import namedtuple
+
+# Immutable (row, col) pair; shared by the precomputed block shape tables
+Position = namedtuple("Position", ["row", "col"])
@@ -0,0 +1,283 @@
+# profiler.py - Per-frame phase timing, overlay and CSV export
+#
+# A game loop calls begin_frame() at the top of a frame, mark(name) after
+# each phase (event handling, update, every draw call, the display update,
+# the frame-rate wait) and end_frame() at the bottom. Each mark charges the
+# time since the previous one to that phase. While disabled every call
+# returns at once, so the hooks can stay in the loops permanently.
+#
+# F3 toggles the overlay (a rolling frame-time graph plus the average cost
+# of each phase) and F4 writes the recorded frames to a CSV file in
+# PROFILE_DIR for offline analysis.
+#
+# F5 (or TETRIS_TRACE_ALLOC=1 at startup) switches on allocation tracking:
+# tracemalloc follows every allocation and each frame is charged its net
+# and peak memory, the garbage collections that ran during it, and the
+# blocks still alive at its end by call site. Switching it off prints the
+# report and writes it to PROFILE_DIR. This is slow; it is for finding what
+# allocates in the game loop, not for timing it.
+
+import csv
+import gc
+import os
+import time
+import tracemalloc
+from collections import deque
+
+import pygame
+
+from text_cache import get_font
+
+# Frames kept for the graph and the CSV export
+HISTORY = 3600
+
+# Frames averaged for the per-phase breakdown
+AVERAGE_FRAMES = 60
+
+# How often the breakdown text is re-rendered, in ms
+TEXT_REFRESH_MS = 500
+
+TOGGLE_KEY = pygame.K_F3
+EXPORT_KEY = pygame.K_F4
+ALLOC_KEY = pygame.K_F5
+
+# Call sites listed in the allocation report
+ALLOC_REPORT_SITES = 20
+
+# Where F4 writes CSV files
+PROFILE_DIR = os.environ.get("TETRIS_PROFILE_DIR", "profiles")
+
+OVERLAY_SIZE = (260, 170)
+GRAPH_HEIGHT = 50
+BUDGET_MS = 1000 / 60
+
+PHASE_COLORS = [(0, 200, 255), (255, 200, 0), (255, 80, 200), (80, 255, 80),
+                (255, 80, 80), (120, 120, 255), (255, 160, 60), (200, 200, 200)]
+
+
+class AllocationTracker:
+    """Per-frame allocation accounting with tracemalloc"""
+
+    def __init__(self):
+        self.enabled = False
+        self.frames = 0
+        self.net_bytes = 0
+        self.peak_bytes = 0  # Sum over frames of the peak above the frame's starting memory
+        self.collections = 0
+        self.sites = {}  # "file:line" -> [blocks, bytes] still alive at frame ends
+        self.frame_memory = 0
+        self.previous = None
+
+    def start(self):
+        self.__init__()
+        self.enabled = True
+        tracemalloc.start()
+        gc.callbacks.append(self.on_gc)
+        self.previous = self.snapshot()
+
+    def stop(self):
+        """Stop tracking and return the report"""
+        self.enabled = False
+        gc.callbacks.remove(self.on_gc)
+        tracemalloc.stop()
+        self.previous = None
+        return self.report()
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.collections += 1
+
+    def snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def begin_frame(self):
+        tracemalloc.reset_peak()
+        self.frame_memory = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.frames += 1
+        self.net_bytes += current - self.frame_memory
+        self.peak_bytes += peak - self.frame_memory
+        snapshot = self.snapshot()
+        for stat in snapshot.compare_to(self.previous, "lineno"):
+            if stat.count_diff > 0:
+                frame = stat.traceback[0]
+                site = self.sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                site[0] += stat.count_diff
+                site[1] += max(0, stat.size_diff)
+        self.previous = snapshot
+
+    def report(self, limit=ALLOC_REPORT_SITES):
+        frames = max(1, self.frames)
+        lines = [f"Allocation report: {self.frames} frames",
+                 f"  net per frame:  {self.net_bytes / frames:10.1f} bytes",
+                 f"  peak per frame: {self.peak_bytes / frames:10.1f} bytes above the frame's start",
+                 f"  gc runs:        {self.collections} ({self.collections * 1000 / frames:.1f} per 1000 frames)",
+                 "  new blocks alive at frame end, by call site (per frame):"]
+        sites = sorted(self.sites.items(), key=lambda item: -item[1][0])[:limit]
+        for site, (blocks, size) in sites:
+            lines.append(f"    {blocks / frames:8.2f} blocks {size / frames:10.1f} bytes  {site}")
+        return "\n".join(lines)
+
+
+class FrameProfiler:
+    """Splits each frame into named phases and keeps the last HISTORY frames"""
+
+    def __init__(self, history=HISTORY, enabled=False, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.frames = deque(maxlen=history)  # (frame ms, {phase: ms})
+        self.phases = []  # Phase names in first-seen order (CSV columns, legend)
+        self.frame_start = self.last_mark = 0.0
+        self.current = {}
+        self.drawn_rect = None
+        self.text_lines = []
+        self.text_time = 0
+        self.allocations = AllocationTracker()
+        if os.environ.get("TETRIS_TRACE_ALLOC"):
+            self.allocations.start()
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            # Switched on mid-frame: start timing from here
+            self.frames.clear()
+            self.frame_start = self.last_mark = self.clock()
+            self.current = {}
+
+    def handle_event(self, event):
+        """F3 toggles profiling, F4 exports a CSV, F5 toggles allocation tracking; returns True if the key was used"""
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == TOGGLE_KEY:
+            self.toggle()
+        elif event.key == EXPORT_KEY:
+            path = self.export_csv()
+            if path:
+                print(f"Frame profile written to {path}")
+        elif event.key == ALLOC_KEY:
+            self.toggle_allocations()
+        else:
+            return False
+        return True
+
+    def toggle_allocations(self):
+        """Start allocation tracking, or stop it and print/save the report"""
+        if not self.allocations.enabled:
+            self.allocations.start()
+            return
+        report = self.allocations.stop()
+        print(report)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"allocations_{int(time.time() * 1000)}.txt")
+        with open(path, "w") as f:
+            f.write(report + "\n")
+        print(f"Allocation report written to {path}")
+
+    def begin_frame(self):
+        if self.allocations.enabled:
+            self.allocations.begin_frame()
+        if not self.enabled:
+            return
+        self.frame_start = self.last_mark = self.clock()
+        self.current = {}
+
+    def mark(self, phase):
+        """Charge the time since the previous mark to `phase`"""
+        if not self.enabled:
+            return
+        now = self.clock()
+        if phase not in self.current and phase not in self.phases:
+            self.phases.append(phase)
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_frame(self):
+        if self.allocations.enabled:
+            self.allocations.end_frame()
+        if not self.enabled:
+            return
+        self.frames.append(((self.clock() - self.frame_start) * 1000, self.current))
+
+    def averages(self, count=AVERAGE_FRAMES):
+        """Mean ms per phase over the last `count` frames, plus the mean frame time"""
+        recent = list(self.frames)[-count:]
+        if not recent:
+            return 0.0, {}
+        totals = dict.fromkeys(self.phases, 0.0)
+        for _, phases in recent:
+            for phase, ms in phases.items():
+                totals[phase] += ms
+        frame_ms = sum(frame for frame, _ in recent) / len(recent)
+        return frame_ms, {phase: total / len(recent) for phase, total in totals.items()}
+
+    def export_csv(self, directory=None):
+        """Write one row per recorded frame to `directory` (default PROFILE_DIR); returns the path or None"""
+        if not self.frames:
+            return None
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"frames_{int(time.time() * 1000)}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "frame_ms"] + self.phases)
+            for index, (frame_ms, phases) in enumerate(self.frames):
+                writer.writerow([index, f"{frame_ms:.3f}"] +
+                                [f"{phases.get(phase, 0.0):.3f}" for phase in self.phases])
+        return path
+
+    def erase_rect(self):
+        """The screen rect the overlay covered last frame (to repaint), then forget it"""
+        rect, self.drawn_rect = self.drawn_rect, None
+        return rect
+
+    def draw(self, surface, x, y):
+        """Draw the overlay with its top-left at (x, y); returns its rect, or None when disabled"""
+        if not self.enabled:
+            return None
+        width, height = OVERLAY_SIZE
+        rect = pygame.Rect(x, y, width, height)
+        surface.fill((25, 25, 40), rect)
+        pygame.draw.rect(surface, (120, 120, 120), rect, 1)
+
+        # Frame-time graph, newest frame on the right, with the 60 fps budget line
+        graph_bottom = y + 4 + GRAPH_HEIGHT
+        scale = GRAPH_HEIGHT / (BUDGET_MS * 2)
+        recent = list(self.frames)[-(width - 8):]
+        left = x + width - 4 - len(recent)
+        for i, (frame_ms, _) in enumerate(recent):
+            bar = min(GRAPH_HEIGHT, int(frame_ms * scale) + 1)
+            color = (80, 255, 80) if frame_ms <= BUDGET_MS else (255, 80, 80)
+            pygame.draw.line(surface, color, (left + i, graph_bottom), (left + i, graph_bottom - bar))
+        budget_y = graph_bottom - int(BUDGET_MS * scale)
+        pygame.draw.line(surface, (255, 255, 255), (x + 4, budget_y), (x + width - 5, budget_y))
+
+        # Per-phase breakdown; the text changes constantly, so it is rendered
+        # straight from the font (not through text_cache) and only refreshed
+        # every TEXT_REFRESH_MS
+        now = pygame.time.get_ticks()
+        if now - self.text_time >= TEXT_REFRESH_MS or not self.text_lines:
+            self.text_time = now
+            font = get_font("Arial", 12)
+            frame_ms, phases = self.averages()
+            rows = [(f"frame ({1000 / frame_ms if frame_ms else 0:.0f} fps)", frame_ms, (255, 255, 255))]
+            for phase, ms in sorted(phases.items(), key=lambda item: -item[1])[:6]:
+                rows.append((phase, ms, PHASE_COLORS[self.phases.index(phase) % len(PHASE_COLORS)]))
+            self.text_lines = [(font.render(name, True, color), font.render(f"{ms:.2f} ms", True, color))
+                               for name, ms, color in rows]
+        text_y = graph_bottom + 4
+        for name, value in self.text_lines:
+            surface.blit(name, (x + 4, text_y))
+            surface.blit(value, (x + width - 4 - value.get_width(), text_y))
+            text_y += name.get_height()
+
+        self.drawn_rect = rect
+        return rect
+
+
+# Shared by every game loop
+profiler = FrameProfiler()
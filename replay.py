@@ -0,0 +1,283 @@
+# replay.py - Compact binary game replays and headless verification
+#
+# A replay is the game's seed plus a list of timestamped inputs. Times are
+# game milliseconds stored as varint deltas, so a typical game is a few
+# hundred bytes. Replaying re-simulates the inputs headlessly and checks the
+# final score and board hash recorded when the game ended. Multiplayer
+# games advance in fixed timestep.STEP_MS steps, so the steps follow from
+# the recorded duration and only the inputs between them are stored.
+#
+# Layout:
+#   b"TRPL" | version byte | mode byte | piece-mode byte | varint seed
+#   records: varint delta_ms | code byte (high nibble player, low nibble action)
+#            [| flags byte for HAT]
+#   END code | varint player count | per player: varint score, 8-byte board hash
+#
+# Usage: python replay.py verify FILE [FILE ...]
+#        python replay.py info FILE
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+from engine import TetrisEngine
+from pieces import PIECE_MODES
+from timestep import STEP_MS
+
+MAGIC = b"TRPL"
+VERSION = 2
+
+MODE_SINGLE = 0
+MODE_MULTI = 1
+
+# Record codes (low nibble). 0-5 are the engine actions (NOOP, LEFT, RIGHT,
+# DOWN, ROTATE, DROP); in multiplayer LEFT/RIGHT/DOWN are key presses.
+RELEASE_LEFT = 6
+RELEASE_RIGHT = 7
+RELEASE_DOWN = 8
+HAT = 9  # Followed by a flags byte: bit 0 left, bit 1 right, bit 2 down, bit 3 up
+END = 15
+
+# Directory where games save their replays; unset disables recording
+REPLAY_DIR = os.environ.get("TETRIS_REPLAY_DIR")
+
+
+class ReplayError(Exception):
+    pass
+
+
+def write_varint(buf, value):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def read_varint(data, pos):
+    """Decode a varint at data[pos]; returns (value, new_pos)"""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("Truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def board_hash(grid):
+    """8-byte digest of a grid given as a list of rows of cell values"""
+    return hashlib.blake2b(bytes(cell for row in grid for cell in row), digest_size=8).digest()
+
+
+class ReplayRecorder:
+    """Collects inputs during a game and serializes them as a replay"""
+
+    def __init__(self, mode, seed, piece_mode="uniform"):
+        self.mode = mode
+        self.seed = seed
+        self.piece_mode = piece_mode
+        self.buf = bytearray(MAGIC)
+        self.buf += bytes((VERSION, mode, PIECE_MODES.index(piece_mode)))
+        write_varint(self.buf, seed)
+        self.last_time = 0
+        self.finished = False
+
+    def record(self, time_ms, code, player=0, flags=None):
+        """Append one input at game time `time_ms` (must not go backwards)"""
+        if self.finished:
+            return
+        write_varint(self.buf, max(0, time_ms - self.last_time))
+        self.last_time = max(self.last_time, time_ms)
+        self.buf.append((player << 4) | code)
+        if flags is not None:
+            self.buf.append(flags)
+
+    def finish(self, time_ms, results):
+        """Close the log at game time `time_ms` with each player's (score, grid)"""
+        if self.finished:
+            return
+        write_varint(self.buf, max(0, time_ms - self.last_time))
+        self.buf.append(END)
+        write_varint(self.buf, len(results))
+        for score, grid in results:
+            write_varint(self.buf, score)
+            self.buf += board_hash(grid)
+        self.finished = True
+
+    def to_bytes(self):
+        return bytes(self.buf)
+
+    def save(self, directory=None):
+        """Write the replay to `directory` (default REPLAY_DIR); returns the path or None"""
+        directory = directory or REPLAY_DIR
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        kind = "single" if self.mode == MODE_SINGLE else "multi"
+        path = os.path.join(directory, f"{kind}_{self.seed}_{int(time.time() * 1000)}.trpl")
+        with open(path, "wb") as f:
+            f.write(self.buf)
+        return path
+
+
+class Replay:
+    """A parsed replay: header, input records and expected final results"""
+
+    def __init__(self, data):
+        if data[:4] != MAGIC:
+            raise ReplayError("Not a replay file")
+        if len(data) < 7 or data[4] != VERSION:
+            raise ReplayError("Unsupported replay version")
+        self.mode = data[5]
+        if self.mode not in (MODE_SINGLE, MODE_MULTI):
+            raise ReplayError(f"Unknown game mode {self.mode}")
+        players = 1 if self.mode == MODE_SINGLE else 2
+        if data[6] >= len(PIECE_MODES):
+            raise ReplayError(f"Unknown piece mode {data[6]}")
+        self.piece_mode = PIECE_MODES[data[6]]
+        self.seed, pos = read_varint(data, 7)
+
+        # records are (time_ms, player, code, flags)
+        self.records = []
+        now = 0
+        while True:
+            delta, pos = read_varint(data, pos)
+            if pos >= len(data):
+                raise ReplayError("Missing END record")
+            byte = data[pos]
+            pos += 1
+            now += delta
+            code = byte & 0x0F
+            if code == END:
+                break
+            flags = None
+            if code == HAT:
+                if pos >= len(data):
+                    raise ReplayError("Truncated HAT record")
+                flags = data[pos]
+                pos += 1
+            if byte >> 4 >= players:
+                raise ReplayError(f"Input for player {(byte >> 4) + 1} in a {players}-player game")
+            self.records.append((now, byte >> 4, code, flags))
+        self.duration = now
+
+        count, pos = read_varint(data, pos)
+        if count != players:
+            raise ReplayError(f"Expected results for {players} player(s), found {count}")
+        self.results = []
+        for _ in range(count):
+            score, pos = read_varint(data, pos)
+            if pos + 8 > len(data):
+                raise ReplayError("Truncated board hash")
+            self.results.append((score, bytes(data[pos:pos + 8])))
+            pos += 8
+        if pos != len(data):
+            raise ReplayError("Trailing data after the results")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+
+def simulate_single(replay):
+    """Re-run a single-player replay on a TetrisEngine; returns [(score, grid)]"""
+    engine = TetrisEngine(replay.seed, piece_mode=replay.piece_mode)
+    for time_ms, _, code, _ in replay.records:
+        engine.advance(time_ms - engine.elapsed)
+        engine.step(code)
+    engine.advance(replay.duration - engine.elapsed)
+    return [(engine.score, engine.grid)]
+
+
+def simulate_multi(replay):
+    """Re-run a multiplayer replay headlessly; returns [(score, grid)] per player"""
+    # MultiplayerPlayer creates fonts, so give pygame dummy drivers
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from multiplayer import MultiplayerPlayer
+    pygame.font.init()
+
+    players = [MultiplayerPlayer(1, seed=replay.seed, piece_mode=replay.piece_mode),
+               MultiplayerPlayer(2, seed=replay.seed, piece_mode=replay.piece_mode)]
+    for player in players:
+        player.reset_timers(0)
+
+    # The live loop handles a frame's inputs at the current game time and
+    # then runs its steps, so an input at time t lands before the step to
+    # t + STEP_MS; inputs at the final time come after the last step
+    records = replay.records
+    index = 0
+    for step in range(1, replay.duration // STEP_MS + 1):
+        game_time = step * STEP_MS
+        while index < len(records) and records[index][0] < game_time:
+            time_ms, player_index, code, flags = records[index]
+            players[player_index].handle_input(code, time_ms, flags)
+            index += 1
+        for player in players:
+            player.run_tick(game_time)
+    for time_ms, player_index, code, flags in records[index:]:
+        players[player_index].handle_input(code, time_ms, flags)
+    return [(player.score, player.grid.grid) for player in players]
+
+
+def verify(replay):
+    """Simulate a replay and compare with its recorded results; returns (ok, results)"""
+    if replay.mode == MODE_SINGLE:
+        results = simulate_single(replay)
+    else:
+        results = simulate_multi(replay)
+    actual = [(score, board_hash(grid)) for score, grid in results]
+    return actual == replay.results, actual
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and verify Tetris replays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    verify_parser = sub.add_parser("verify", help="re-simulate replays and check their results")
+    verify_parser.add_argument("files", nargs="+")
+    info_parser = sub.add_parser("info", help="show a replay's header")
+    info_parser.add_argument("file")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        try:
+            replay = Replay.load(args.file)
+        except ReplayError as e:
+            print(f"ERROR {args.file}: {e}", file=sys.stderr)
+            sys.exit(1)
+        kind = "single" if replay.mode == MODE_SINGLE else "multi"
+        print(f"{kind} seed={replay.seed} pieces={replay.piece_mode} "
+              f"inputs={len(replay.records)} duration={replay.duration / 1000:.1f}s "
+              f"scores={[score for score, _ in replay.results]}")
+        return
+
+    failures = 0
+    for path in args.files:
+        try:
+            replay = Replay.load(path)
+        except ReplayError as e:
+            print(f"ERROR {path}: {e}")
+            failures += 1
+            continue
+        start = time.perf_counter()
+        ok, actual = verify(replay)
+        elapsed = time.perf_counter() - start
+        speedup = replay.duration / 1000 / elapsed if elapsed else float("inf")
+        status = "OK" if ok else "MISMATCH"
+        print(f"{status} {path}: scores={[score for score, _ in actual]} "
+              f"{len(replay.records)} inputs in {elapsed * 1000:.1f}ms ({speedup:,.0f}x real time)")
+        failures += not ok
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
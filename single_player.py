@@ -2,12 +2,23 @@
 # as multiplayer.py
 
 import pygame
-import random
 import sys
+from functools import lru_cache
 
 # Import sound management system
 from sound_manager import load_game_sounds, play_sound, play_music, stop_music, ensure_music_playing
 
+# Rules live in the headless engine; shapes, board size and speeds are shared with it
+from engine import (TetrisEngine, GRID_WIDTH, GRID_HEIGHT, LEVEL_SPEED,
+                    PIECE_CELLS, LEFT, RIGHT, DOWN, ROTATE, DROP)
+from replay import ReplayRecorder, MODE_SINGLE
+from timestep import FixedTimestep
+from pacing import IdleLoop, ACTIVE, STATIC, governor
+from input_devices import devices
+from profiler import profiler
+from playfield import DirtyPlayfield
+from text_cache import render_text, get_font
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -21,30 +32,25 @@ MAGENTA = (255, 0, 255)
 YELLOW = (255, 255, 0)
 ORANGE = (255, 165, 0)
 
-# Tetromino shapes and colors
-SHAPES = [
-    [[1, 1, 1, 1]],  # I
-    [[1, 1], [1, 1]],  # O
-    [[0, 1, 0], [1, 1, 1]],  # T
-    [[0, 1, 1], [1, 1, 0]],  # S
-    [[1, 1, 0], [0, 1, 1]],  # Z
-    [[1, 0, 0], [1, 1, 1]],  # J
-    [[0, 0, 1], [1, 1, 1]]  # L
-]
-
 COLORS = [CYAN, YELLOW, MAGENTA, GREEN, RED, BLUE, ORANGE]
 
-def get_random_block(cell_size):
-    """Generate a random tetromino shape"""
-    shape_index = random.randint(0, len(SHAPES) - 1)
-    return SHAPES[shape_index]
+@lru_cache(maxsize=4)
+def dim_layer(size, color=(0, 0, 0, 180)):
+    """Translucent full-window surface used to darken the game behind overlays, built once per size"""
+    overlay = pygame.Surface(size, pygame.SRCALPHA)
+    overlay.fill(color)
+    return overlay
+
+def dim_screen(screen, width, height):
+    """Darken the game behind an overlay; a plain fill when the governor has shed alpha effects"""
+    if governor.alpha_effects:
+        screen.blit(dim_layer((width, height)), (0, 0))
+    else:
+        screen.fill(BLACK, (0, 0, width, height))
 
 # Game settings
 CELL_SIZE = 30
-GRID_WIDTH = 10
-GRID_HEIGHT = 20
 PREVIEW_SIZE = 4
-LEVEL_SPEED = [1000, 800, 600, 500, 400, 300, 250, 200, 150, 100]  # ms per drop
 
 # Layout constants
 PANEL_WIDTH = 220
@@ -55,40 +61,35 @@ NEXT_BOX_SIZE = 4 * CELL_SIZE + 2 * INFO_PADDING
 PANEL_HEIGHT = max(GRID_HEIGHT * CELL_SIZE, 350) # Adjusted to ensure enough space for all info
 
 class SinglePlayerGame:
-    def __init__(self, controller=None):
-        """Initialize the single player Tetris game with optional controller support"""
-        # Always initialize joystick
-        pygame.joystick.init()
-        if pygame.joystick.get_count() > 0:
-            self.controller = pygame.joystick.Joystick(0)
-            self.controller.init()
-        else:
-            self.controller = None
-
-        # Game state
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = None
-        self.next_piece = None
-        self.piece_x = 0
-        self.piece_y = 0
-        self.score = 0
-        self.level = 1
-        self.lines_cleared = 0
-        self.game_over = False
+    def __init__(self, slot=0, seed=None, piece_mode="uniform", clock=None):
+        """
+        Initialize the single player Tetris game with optional controller support.
+        `slot` is the player slot whose controller plays (see input_devices.py).
+        `clock` returns the time in ms (default pygame.time.get_ticks); pass a
+        timestep.ManualClock to drive the game headlessly.
+        """
+        self.slot = slot
+
+        # Game state (rules are simulated by the headless engine).
+        # piece_mode is "uniform" or "bag" (see pieces.py).
+        self.engine = TetrisEngine(seed, piece_mode=piece_mode)
+        # Every action is logged against engine time so the game can be replayed
+        self.recorder = ReplayRecorder(MODE_SINGLE, self.engine.seed, piece_mode)
         self.paused = False
         
         # Timer for tracking gameplay time
-        self.start_time = pygame.time.get_ticks()
+        self.get_time = clock or pygame.time.get_ticks
+        self.start_time = self.get_time()
         self.total_time = 0  # In milliseconds
         self.paused_start_time = 0 # To track when pause began
         self.time_spent_paused = 0 # To track total time spent paused
 
 
-        # Timing
-        self.clock = pygame.time.Clock()
-        self.drop_time = pygame.time.get_ticks()
-        self.move_time = pygame.time.get_ticks()
-        self.speed = LEVEL_SPEED[0]
+        # Timing: the rules advance in fixed steps of game time, and held
+        # directions repeat on game time too (move_time is engine ms)
+        self.frame_loop = IdleLoop() # Sleeps between inputs while paused or over
+        self.timestep = FixedTimestep(clock=self.get_time)
+        self.move_time = self.engine.elapsed
         self.move_delay = 100  # ms between moves when holding a direction
 
         # Input state for both keyboard and controller
@@ -99,152 +100,115 @@ class SinglePlayerGame:
         # Initialize sounds
         load_game_sounds()
 
-        # Fonts
-        self.font_big = pygame.font.SysFont("Arial", 36)
-        self.font_medium = pygame.font.SysFont("Arial", 24)
-        self.font_small = pygame.font.SysFont("Arial", 18)
-
-        # Start the game
-        self.new_piece()
-        self.new_piece()  # This creates both current and next piece
-
-    def new_piece(self):
-        """Generate a new Tetris piece"""
-        if self.next_piece:
-            self.current_piece = self.next_piece
-            self.color_index = self.next_color_index
-        else:
-            self.color_index = random.randint(0, len(SHAPES) - 1)
-            self.current_piece = [row[:] for row in SHAPES[self.color_index]]
-
-        self.next_color_index = random.randint(0, len(SHAPES) - 1)
-        self.next_piece = [row[:] for row in SHAPES[self.next_color_index]]
+        # Field renderer that only repaints changed cells
+        self.playfield = DirtyPlayfield(GRID_WIDTH, GRID_HEIGHT, CELL_SIZE,
+                                        lambda value: COLORS[(value - 1) % len(COLORS)])
+        self.piece_overlay_key = None  # Piece state the cached piece/ghost cell lists belong to
+        self.piece_cells = self.ghost_cells = ()
 
-        # Starting position
-        self.piece_x = GRID_WIDTH // 2 - len(self.current_piece[0]) // 2
-        self.piece_y = 0
-
-        # Check if new piece overlaps with existing blocks (game over)
-        if self.check_collision():
-            self.game_over = True
-            play_sound("game_over")
+        # Fonts
+        self.font_big = get_font("Arial", 36)
+        self.font_medium = get_font("Arial", 24)
+        self.font_small = get_font("Arial", 18)
+
+    # Read-only views of the engine state used by the drawing code
+    @property
+    def controller(self):
+        """The controller in this game's player slot (follows hot-plugging)"""
+        return devices.controller(self.slot)
+
+    @property
+    def grid(self):
+        return self.engine.grid
+
+    @property
+    def metrics(self):
+        return self.engine.metrics
+
+    @property
+    def score(self):
+        return self.engine.score
+
+    @property
+    def level(self):
+        return self.engine.level
+
+    @property
+    def lines_cleared(self):
+        return self.engine.lines_cleared
+
+    @property
+    def game_over(self):
+        return self.engine.game_over
+
+    def play_events(self, events):
+        """Play the sounds for events raised by the engine"""
+        for event_name in events:
+            play_sound(event_name)
+
+    def apply_action(self, action):
+        """Send one action to the engine unless the game is paused or over"""
+        if self.game_over or self.paused: return False
+        self.recorder.record(self.engine.elapsed, action)
+        result = self.engine.step(action)
+        self.play_events(result.events)
+        if self.game_over:
+            self.save_replay()
+        return result.moved
+
+    def save_replay(self):
+        """Close the replay log with the final result and save it (once)"""
+        if not self.recorder.finished:
+            self.recorder.finish(self.engine.elapsed, [(self.score, self.grid)])
+            self.recorder.save()
 
     def rotate_piece(self):
         """Rotate the current piece clockwise"""
-        if self.game_over or self.paused: return False
-        original_piece = [row[:] for row in self.current_piece]
-        rotated = list(zip(*self.current_piece[::-1]))
-        self.current_piece = [list(row) for row in rotated]
-
-        if self.check_collision():
-            self.current_piece = original_piece
-            return False
-        
-        play_sound("rotate")
-        return True
-
-    def check_collision(self):
-        """Check if current piece collides with borders or other pieces"""
-        for y, row in enumerate(self.current_piece):
-            for x, cell in enumerate(row):
-                if cell:
-                    grid_x = self.piece_x + x
-                    grid_y = self.piece_y + y
-                    if (grid_x < 0 or grid_x >= GRID_WIDTH or
-                            grid_y >= GRID_HEIGHT or
-                            (grid_y >= 0 and self.grid[grid_y][grid_x])):
-                        return True
-        return False
-
-    def merge_piece(self):
-        """Merge current piece with the grid"""
-        for y, row in enumerate(self.current_piece):
-            for x, cell in enumerate(row):
-                if cell and 0 <= self.piece_y + y < GRID_HEIGHT: # Ensure piece_y + y is within grid
-                    self.grid[self.piece_y + y][self.piece_x + x] = self.color_index + 1
-        play_sound("drop")
-
-    def clear_lines(self):
-        """Clear completed lines and return number of lines cleared"""
-        lines_cleared_count = 0
-        y = GRID_HEIGHT - 1
-        while y >= 0:
-            if all(self.grid[y]):
-                for move_y in range(y, 0, -1):
-                    self.grid[move_y] = self.grid[move_y - 1][:]
-                self.grid[0] = [0] * GRID_WIDTH
-                lines_cleared_count += 1
-            else:
-                y -= 1
-
-        if lines_cleared_count > 0:
-            play_sound("clear")
-            self.score += lines_cleared_count * lines_cleared_count * 100 * self.level
-            self.lines_cleared += lines_cleared_count
-            old_level = self.level
-            self.level = min(10, self.lines_cleared // 10 + 1)
-            if self.level > old_level:
-                play_sound("level_up")
-            self.speed = LEVEL_SPEED[min(9, self.level - 1)]
-        return lines_cleared_count
+        return self.apply_action(ROTATE)
 
     def move_left(self):
         """Move the piece left if possible"""
-        if self.game_over or self.paused: return False
-        self.piece_x -= 1
-        if self.check_collision():
-            self.piece_x += 1
-            return False
-        play_sound("move")
-        return True
+        return self.apply_action(LEFT)
 
     def move_right(self):
         """Move the piece right if possible"""
-        if self.game_over or self.paused: return False
-        self.piece_x += 1
-        if self.check_collision():
-            self.piece_x -= 1
-            return False
-        play_sound("move")
-        return True
-
-    def move_down(self):
-        """Move the piece down if possible"""
-        if self.game_over or self.paused: return False
-        self.piece_y += 1
-        if self.check_collision():
-            self.piece_y -= 1
-            self.merge_piece()
-            self.clear_lines()
-            self.new_piece()
-            return False
-        return True
+        return self.apply_action(RIGHT)
+
+    def soft_drop(self):
+        """Move the piece down one row, scoring a point if it moved"""
+        return self.apply_action(DOWN)
 
     def drop_piece(self):
         """Hard drop the piece to the bottom"""
-        if self.game_over or self.paused: return
-        while self.move_down():
-            self.score +=2 # Add small score for hard drop
-        # play_sound("drop") # move_down already calls merge_piece which plays drop sound
+        self.apply_action(DROP)
 
     def update(self):
-        """Update game state"""
+        """Run the fixed simulation steps due since the last frame"""
+        current_time = self.get_time()
+        steps = self.timestep.steps()
+
         if self.game_over or self.paused:
             if self.paused and not self.game_over: # Keep updating timer display even if paused
-                 current_time = pygame.time.get_ticks()
                  self.total_time = (current_time - self.start_time) - self.time_spent_paused
             return
 
-        current_time = pygame.time.get_ticks()
-        
-        if not self.game_over and not self.paused:
-            self.total_time = (current_time - self.start_time) - self.time_spent_paused
+        self.total_time = (current_time - self.start_time) - self.time_spent_paused
 
+        for _ in range(steps):
+            self.tick(self.timestep.step_ms)
+            if self.game_over:
+                return
 
-        if current_time - self.drop_time > self.speed:
-            self.move_down()
-            self.drop_time = current_time
+    def tick(self, dt):
+        """Advance the game by one step of `dt` ms: gravity, then held-direction auto-repeat"""
+        self.engine.events.clear()
+        self.engine.advance(dt)
+        self.play_events(self.engine.events)
+        if self.game_over:
+            self.save_replay()
+            return
 
+        current_time = self.engine.elapsed
         if current_time - self.move_time > self.move_delay:
             if self.left_pressed:
                 self.move_left()
@@ -253,11 +217,9 @@ class SinglePlayerGame:
                 self.move_right()
                 self.move_time = current_time
             elif self.down_pressed:
-                if self.move_down(): # Only add score if soft drop is successful
-                    self.score +=1
+                self.soft_drop()
                 self.move_time = current_time
 
-
     def handle_input(self, event):
         """Handle keyboard and controller input"""
         if event.type == pygame.KEYDOWN:
@@ -265,11 +227,12 @@ class SinglePlayerGame:
                 if not self.game_over:
                     if not self.paused:
                         self.paused = True
-                        self.paused_start_time = pygame.time.get_ticks() # Record when pause starts
+                        self.paused_start_time = self.get_time() # Record when pause starts
                         stop_music() # Optionally pause music
                     else:
                         self.paused = False
-                        self.time_spent_paused += pygame.time.get_ticks() - self.paused_start_time # Add duration of this pause
+                        self.time_spent_paused += self.get_time() - self.paused_start_time # Add duration of this pause
+                        self.timestep.reset() # Paused time is not simulated
                         play_music() # Optionally resume music
                 return # Prevent other actions if pause key is pressed
             
@@ -277,23 +240,22 @@ class SinglePlayerGame:
 
             if self.game_over:
                 if event.key == pygame.K_r:
-                    self.__init__(self.controller)
+                    self.__init__(self.slot, piece_mode=self.engine.piece_mode, clock=self.get_time)
                     play_music()
                 return
 
             if event.key == pygame.K_LEFT:
                 self.left_pressed = True
                 self.move_left()
-                self.move_time = pygame.time.get_ticks()
+                self.move_time = self.engine.elapsed
             elif event.key == pygame.K_RIGHT:
                 self.right_pressed = True
                 self.move_right()
-                self.move_time = pygame.time.get_ticks()
+                self.move_time = self.engine.elapsed
             elif event.key == pygame.K_DOWN:
                 self.down_pressed = True
-                if self.move_down():
-                     self.score +=1
-                self.move_time = pygame.time.get_ticks()
+                self.soft_drop()
+                self.move_time = self.engine.elapsed
             elif event.key == pygame.K_UP:
                 self.rotate_piece()
             elif event.key == pygame.K_SPACE:
@@ -325,17 +287,18 @@ class SinglePlayerGame:
             elif event.key == pygame.K_DOWN:
                 self.down_pressed = False
 
-        if self.controller:
+        if self.controller and devices.slot_of(event) == self.slot: # Only this player's pad
             if event.type == pygame.JOYBUTTONDOWN:
                 if self.controller.get_button(9): # Start button
                     if not self.game_over:
                         if not self.paused:
                             self.paused = True
-                            self.paused_start_time = pygame.time.get_ticks()
+                            self.paused_start_time = self.get_time()
                             stop_music()
                         else:
                             self.paused = False
-                            self.time_spent_paused += pygame.time.get_ticks() - self.paused_start_time
+                            self.time_spent_paused += self.get_time() - self.paused_start_time
+                            self.timestep.reset()
                             play_music()
                     return
                 
@@ -343,7 +306,7 @@ class SinglePlayerGame:
 
                 if self.game_over:
                     if self.controller.get_button(8): # Share button for restart
-                        self.__init__(self.controller)
+                        self.__init__(self.slot, piece_mode=self.engine.piece_mode, clock=self.get_time)
                         play_music()
                     return
 
@@ -362,14 +325,13 @@ class SinglePlayerGame:
 
                 if hat_x == -1:
                     self.move_left()
-                    self.move_time = pygame.time.get_ticks()
+                    self.move_time = self.engine.elapsed
                 elif hat_x == 1:
                     self.move_right()
-                    self.move_time = pygame.time.get_ticks()
+                    self.move_time = self.engine.elapsed
                 if hat_y == -1: # Soft drop with D-pad
-                    if self.move_down():
-                        self.score +=1
-                    self.move_time = pygame.time.get_ticks()
+                    self.soft_drop()
+                    self.move_time = self.engine.elapsed
             
             if event.type == pygame.JOYAXISMOTION:
                 if self.paused: return # Ignore axis motion if paused
@@ -382,46 +344,46 @@ class SinglePlayerGame:
                 if left_stick_x < -deadzone:
                     if not self.left_pressed: # Prevent rapid re-triggering if already moving
                         self.left_pressed = True; self.right_pressed = False
-                        self.move_left(); self.move_time = pygame.time.get_ticks()
+                        self.move_left(); self.move_time = self.engine.elapsed
                 elif left_stick_x > deadzone:
                     if not self.right_pressed:
                         self.right_pressed = True; self.left_pressed = False
-                        self.move_right(); self.move_time = pygame.time.get_ticks()
+                        self.move_right(); self.move_time = self.engine.elapsed
                 else:
                     self.left_pressed = False; self.right_pressed = False
                 
                 if left_stick_y > deadzone: # Analog stick down for soft drop
                     if not self.down_pressed:
                         self.down_pressed = True
-                        if self.move_down():
-                            self.score +=1
-                        self.move_time = pygame.time.get_ticks()
+                        self.soft_drop()
+                        self.move_time = self.engine.elapsed
                 else:
                     self.down_pressed = False
 
 
-    def draw_grid(self, screen, offset_x, offset_y):
-        pygame.draw.rect(screen, BLACK, (offset_x, offset_y, GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE))
-        for y_idx in range(GRID_HEIGHT):
-            for x_idx in range(GRID_WIDTH):
-                if self.grid[y_idx][x_idx]:
-                    color_idx = self.grid[y_idx][x_idx] - 1
-                    pygame.draw.rect(screen, COLORS[color_idx % len(COLORS)],
-                                     (offset_x + x_idx * CELL_SIZE, offset_y + y_idx * CELL_SIZE,
-                                      CELL_SIZE - 1, CELL_SIZE - 1))
-        if not self.game_over and self.current_piece: # Check if current_piece is not None
-            for y_offset, row in enumerate(self.current_piece):
-                for x_offset, cell in enumerate(row):
-                    if cell:
-                        pygame.draw.rect(screen, COLORS[self.color_index % len(COLORS)],
-                                         (offset_x + (self.piece_x + x_offset) * CELL_SIZE,
-                                          offset_y + (self.piece_y + y_offset) * CELL_SIZE,
-                                          CELL_SIZE - 1, CELL_SIZE - 1))
-        pygame.draw.rect(screen, WHITE, (offset_x, offset_y, GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE), 2)
+    def render_playfield(self, screen, offset_x, offset_y):
+        """Repaint the field cells that changed since the last frame; returns the dirty rects"""
+        engine = self.engine
+        piece_cells = ghost_cells = ()
+        if not self.game_over and engine.current_piece:
+            ghost_y = engine.landing_row()
+            # The cell lists are rebuilt only when the piece moves, so a still
+            # piece is recognised by the playfield without allocating
+            key = (engine.pieces, engine.rotation, engine.piece_x, engine.piece_y, ghost_y)
+            if key != self.piece_overlay_key:
+                self.piece_overlay_key = key
+                cells = PIECE_CELLS[engine.color_index][engine.rotation]
+                self.piece_cells = [(engine.piece_y + y, engine.piece_x + x) for y, x in cells]
+                self.ghost_cells = [(ghost_y + y, engine.piece_x + x) for y, x in cells]
+            piece_cells, ghost_cells = self.piece_cells, self.ghost_cells
+        return self.playfield.render(screen, offset_x, offset_y, self.grid, piece_cells,
+                                     COLORS[engine.color_index % len(COLORS)], ghost_cells)
 
     def draw_next_piece(self, screen, offset_x, offset_y):
         # Ensure next_piece and its color_index exist
-        if not self.next_piece or self.next_color_index is None:
+        next_piece = self.engine.next_piece
+        next_color_index = self.engine.next_color_index
+        if not next_piece or next_color_index is None:
             return
 
         preview_box_total_width = PREVIEW_SIZE * CELL_SIZE
@@ -431,8 +393,8 @@ class SinglePlayerGame:
         pygame.draw.rect(screen, BLACK, (offset_x, offset_y, preview_box_total_width, preview_box_total_height))
         pygame.draw.rect(screen, WHITE, (offset_x, offset_y, preview_box_total_width, preview_box_total_height), 2)
 
-        piece_width_cells = len(self.next_piece[0])
-        piece_height_cells = len(self.next_piece)
+        piece_width_cells = len(next_piece[0])
+        piece_height_cells = len(next_piece)
         
         # Calculate offsets to center the piece within the preview box
         start_x_offset_in_box = (preview_box_total_width - (piece_width_cells * CELL_SIZE)) // 2
@@ -441,63 +403,86 @@ class SinglePlayerGame:
         draw_start_x = offset_x + start_x_offset_in_box
         draw_start_y = offset_y + start_y_offset_in_box
 
-        for y, row in enumerate(self.next_piece):
+        for y, row in enumerate(next_piece):
             for x, cell in enumerate(row):
                 if cell:
-                    pygame.draw.rect(screen, COLORS[self.next_color_index % len(COLORS)],
+                    pygame.draw.rect(screen, COLORS[next_color_index % len(COLORS)],
                                      (draw_start_x + x * CELL_SIZE, 
                                       draw_start_y + y * CELL_SIZE,
                                       CELL_SIZE - 1, CELL_SIZE - 1))
 
-    def draw_info(self, screen, panel_base_x, panel_base_y):
-        """Draw game information: score, level, time, and next piece preview."""
-        info_panel_width = PANEL_WIDTH - INFO_PADDING * 2 # Actual drawable width inside panel
-        
-        # Score Panel Background (adjust height as needed)
+    def score_panel_rect(self, panel_base_x, panel_base_y):
+        """Box holding the score, level and time"""
         score_panel_height = 180 # Increased height for timer
-        score_bg_rect_x = panel_base_x + INFO_PADDING
-        score_bg_rect_y = panel_base_y + INFO_PADDING
-        
-        score_bg = pygame.Surface((info_panel_width, score_panel_height))
-        score_bg.fill(GRAY)
-        pygame.draw.rect(score_bg, WHITE, score_bg.get_rect(), 2)
-        
+        return pygame.Rect(panel_base_x + INFO_PADDING, panel_base_y + INFO_PADDING,
+                           PANEL_WIDTH - INFO_PADDING * 2, score_panel_height)
+
+    def next_label_rect(self, panel_base_x, panel_base_y):
+        """Where the "Next:" label goes, below the score box"""
+        score_panel = self.score_panel_rect(panel_base_x, panel_base_y)
+        label = render_text(self.font_medium, "Next:", WHITE)
+        return label.get_rect(left=score_panel.left, top=score_panel.bottom + INFO_PADDING)
+
+    def draw_info_background(self, screen, panel_base_x, panel_base_y):
+        """Static parts of the info panel: the score box frame and the "Next:" label"""
+        score_panel = self.score_panel_rect(panel_base_x, panel_base_y)
+        screen.fill(GRAY, score_panel)
+        pygame.draw.rect(screen, WHITE, score_panel, 2)
+        screen.blit(render_text(self.font_medium, "Next:", WHITE), self.next_label_rect(panel_base_x, panel_base_y))
+
+    def draw_info(self, screen, panel_base_x, panel_base_y):
+        """Draw the changing game information over the background: score, level, time and next piece."""
+        score_panel = self.score_panel_rect(panel_base_x, panel_base_y)
+        center_x = score_panel.left + score_panel.width // 2
+
+        # Texts are clipped to the score box
+        previous_clip = screen.get_clip()
+        screen.set_clip(score_panel.clip(previous_clip))
+
         # Score Text
-        score_text_render = self.font_big.render(f"Score: {self.score}", True, WHITE)
-        score_rect = score_text_render.get_rect(midtop=(info_panel_width // 2, INFO_PADDING))
-        score_bg.blit(score_text_render, score_rect)
+        score_text_render = render_text(self.font_big, f"Score: {self.score}", WHITE)
+        score_rect = score_text_render.get_rect(midtop=(center_x, score_panel.top + INFO_PADDING))
+        screen.blit(score_text_render, score_rect)
         
         # Level Text
-        level_text_render = self.font_medium.render(f"Level: {self.level}", True, WHITE)
-        level_rect = level_text_render.get_rect(midtop=(info_panel_width // 2, score_rect.bottom + 5))
-        score_bg.blit(level_text_render, level_rect)
+        level_text_render = render_text(self.font_medium, f"Level: {self.level}", WHITE)
+        level_rect = level_text_render.get_rect(midtop=(center_x, score_rect.bottom + 5))
+        screen.blit(level_text_render, level_rect)
         
         # Timer Text
         minutes = self.total_time // 60000
         seconds = (self.total_time % 60000) // 1000
         time_str = f"Time: {minutes:02d}:{seconds:02d}"
-        time_text_render = self.font_medium.render(time_str, True, WHITE)
-        time_rect = time_text_render.get_rect(midtop=(info_panel_width // 2, level_rect.bottom + 5))
-        score_bg.blit(time_text_render, time_rect)
-        
-        screen.blit(score_bg, (score_bg_rect_x, score_bg_rect_y))
-        
-        # Next Piece Preview
-        next_piece_label_text = self.font_medium.render("Next:", True, WHITE)
-        next_piece_label_rect = next_piece_label_text.get_rect(left=score_bg_rect_x, top=score_bg_rect_y + score_panel_height + INFO_PADDING)
-        screen.blit(next_piece_label_text, next_piece_label_rect)
+        time_text_render = render_text(self.font_medium, time_str, WHITE)
+        time_rect = time_text_render.get_rect(midtop=(center_x, level_rect.bottom + 5))
+        screen.blit(time_text_render, time_rect)
+
+        screen.set_clip(previous_clip)
         
         # Position next piece preview box below the label
-        next_piece_box_x = score_bg_rect_x
-        next_piece_box_y = next_piece_label_rect.bottom + 5 # Small padding
+        next_piece_box_x = score_panel.left
+        next_piece_box_y = self.next_label_rect(panel_base_x, panel_base_y).bottom + 5 # Small padding
         self.draw_next_piece(screen, next_piece_box_x, next_piece_box_y)
 
-        # Note: draw_controls is now called directly in the run loop to avoid duplication
-        # self.draw_controls(screen, panel_base_x + INFO_PADDING, next_piece_box_y + PREVIEW_SIZE * CELL_SIZE + INFO_PADDING * 2)
+    def build_background(self, width, height, panel_base_x, panel_base_y, controls_y):
+        """
+        Compose everything that does not change during a game (background
+        fill, volume hint, panel frame, labels and controls) into one surface.
+        """
+        background = pygame.Surface((width, height)).convert()
+        background.fill(GRAY)
 
+        # Volume info text
+        volume_info_text = render_text(self.font_small, "Volume: +/- (M to mute)", WHITE)
+        volume_rect = volume_info_text.get_rect(center=(width // 2, height - 20))
+        background.blit(volume_info_text, volume_rect)
+
+        self.draw_info_background(background, panel_base_x, panel_base_y)
+        self.draw_controls(background, panel_base_x + INFO_PADDING, controls_y)
+        return background
 
     def draw_controls(self, screen, offset_x, offset_y):
-        title_text = self.font_medium.render("Controls:", True, WHITE)
+        title_text = render_text(self.font_medium, "Controls:", WHITE)
         screen.blit(title_text, (offset_x, offset_y))
         y_spacing = 20
         current_y = offset_y + title_text.get_height() + 5
@@ -521,68 +506,51 @@ class SinglePlayerGame:
             ]
 
         for control in controls:
-            control_text = self.font_small.render(control, True, WHITE)
+            control_text = render_text(self.font_small, control, WHITE)
             screen.blit(control_text, (offset_x, current_y))
             current_y += y_spacing
 
     def draw_game_over(self, screen, width, height):
-        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
+        dim_screen(screen, width, height)
 
-        game_over_text = self.font_big.render("GAME OVER", True, RED)
+        game_over_text = render_text(self.font_big, "GAME OVER", RED)
         text_rect = game_over_text.get_rect(center=(width // 2, height // 2 - 60))
         screen.blit(game_over_text, text_rect)
 
-        score_text = self.font_medium.render(f"Final Score: {self.score}", True, WHITE)
+        score_text = render_text(self.font_medium, f"Final Score: {self.score}", WHITE)
         score_rect = score_text.get_rect(center=(width // 2, height // 2 - 20))
         screen.blit(score_text, score_rect)
         
         minutes = self.total_time // 60000
         seconds = (self.total_time % 60000) // 1000
         time_str = f"Time: {minutes:02d}:{seconds:02d}"
-        time_text_render = self.font_medium.render(time_str, True, WHITE)
+        time_text_render = render_text(self.font_medium, time_str, WHITE)
         time_rect = time_text_render.get_rect(center=(width // 2, score_rect.bottom + 20))
         screen.blit(time_text_render, time_rect)
 
 
         restart_instruction = "Press Share (Controller) or R (Keyboard) to Restart"
         if self.controller:
-             restart_text_render = self.font_medium.render("Press Share Button to Restart", True, WHITE)
+             restart_text_render = render_text(self.font_medium, "Press Share Button to Restart", WHITE)
         else:
-             restart_text_render = self.font_medium.render("Press R to Restart", True, WHITE)
+             restart_text_render = render_text(self.font_medium, "Press R to Restart", WHITE)
         restart_rect = restart_text_render.get_rect(center=(width // 2, time_rect.bottom + 30))
         screen.blit(restart_text_render, restart_rect)
 
     def draw_pause(self, screen, width, height):
-        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
+        dim_screen(screen, width, height)
 
-        pause_text_render = self.font_big.render("PAUSED", True, WHITE)
+        pause_text_render = render_text(self.font_big, "PAUSED", WHITE)
         text_rect = pause_text_render.get_rect(center=(width // 2, height // 2 - 30))
         screen.blit(pause_text_render, text_rect)
 
         if self.controller:
-            continue_text = self.font_medium.render("Press Start Button to Continue", True, WHITE)
+            continue_text = render_text(self.font_medium, "Press Start Button to Continue", WHITE)
         else:
-            continue_text = self.font_medium.render("Press P to Continue", True, WHITE)
+            continue_text = render_text(self.font_medium, "Press P to Continue", WHITE)
         continue_rect = continue_text.get_rect(center=(width // 2, height // 2 + 20))
         screen.blit(continue_text, continue_rect)
 
-    def check_controller(self):
-        if not self.controller or not self.controller.get_init():
-            pygame.joystick.quit()
-            pygame.joystick.init()
-            if pygame.joystick.get_count() > 0:
-                try:
-                    self.controller = pygame.joystick.Joystick(0)
-                    self.controller.init()
-                except pygame.error:
-                    self.controller = None # Handle case where joystick init fails
-            else:
-                self.controller = None
-
     def run(self, screen_surface): # Renamed screen to screen_surface to avoid conflict
         # Calculate window size and positions
         # Use PANEL_HEIGHT which is max(GRID_HEIGHT * CELL_SIZE, 350)
@@ -604,7 +572,7 @@ class SinglePlayerGame:
 
 
         # Re-set mode with potentially new height
-        current_screen = pygame.display.set_mode((window_width, window_height))
+        current_screen = governor.set_mode((window_width, window_height))
         pygame.display.set_caption("Tetris - Single Player")
 
 
@@ -621,60 +589,108 @@ class SinglePlayerGame:
         controls_y_offset = panel_base_y + INFO_PADDING + 180 + INFO_PADDING + next_piece_box_height_with_label + INFO_PADDING * 2
 
 
+        # Area repainted when the score, time or next piece changes
+        panel_rect = pygame.Rect(panel_base_x, panel_base_y, window_width - panel_base_x, actual_panel_height)
+
         play_music()
         running = True
+        full_redraw = True
+        shown_overlay = shown_hud = shown_background = None
+        hud_time = 0  # When the panel was last repainted; the governor may throttle it
+        # Profiler overlay position (inside the field, so only cells sit under it)
+        profiler_x, profiler_y = grid_x + 20, grid_y + 20
         while running:
-            self.check_controller()
+            profiler.begin_frame()
+            mode = STATIC if self.paused or self.game_over else ACTIVE
+            events = self.frame_loop.events(mode)
+            profiler.mark("tick")
+
             ensure_music_playing()
-            
-            for event in pygame.event.get():
+            for event in events:
+                if devices.handle_event(event) or profiler.handle_event(event):
+                    continue
                 if event.type == pygame.QUIT:
-                    running = False; stop_music(); return
+                    running = False; stop_music(); self.save_replay(); return
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                    running = False; stop_music(); return
-                if self.controller and event.type == pygame.JOYBUTTONDOWN:
-                    if self.controller.get_button(1): # Circle for back/escape
-                        running = False; stop_music(); return
+                    running = False; stop_music(); self.save_replay(); return
+                if (event.type == pygame.JOYBUTTONDOWN and event.button == 1  # Circle for back/escape
+                        and devices.slot_of(event) == self.slot):
+                    running = False; stop_music(); self.save_replay(); return
                 self.handle_input(event)
+            profiler.mark("events")
 
             self.update()
-            current_screen.fill(GRAY)
-
-            # Volume info text
-            volume_info_text = self.font_small.render("Volume: +/- (M to mute)", True, WHITE)
-            volume_rect = volume_info_text.get_rect(center=(window_width // 2, window_height - 20))
-            current_screen.blit(volume_info_text, volume_rect)
-
-            self.draw_grid(current_screen, grid_x, grid_y)
-            self.draw_info(current_screen, panel_base_x, panel_base_y) 
-            self.draw_controls(current_screen, panel_base_x + INFO_PADDING, controls_y_offset)
-
-
-            if self.paused:
-                self.draw_pause(current_screen, window_width, window_height)
-            elif self.game_over:
-                self.draw_game_over(current_screen, window_width, window_height)
-
-            pygame.display.flip()
-            self.clock.tick(60)
+            profiler.mark("update")
+
+            overlay = "pause" if self.paused else "game_over" if self.game_over else None
+            hud = (self.score, self.level, self.total_time // 1000,
+                   self.engine.next_color_index, self.controller is not None)
+
+            # The static layer depends on the window size and the controls shown
+            background_key = (current_screen.get_size(), self.controller is not None)
+            if background_key != shown_background:
+                background = self.build_background(window_width, window_height,
+                                                   panel_base_x, panel_base_y, controls_y_offset)
+                shown_background = background_key
+                full_redraw = True
+                profiler.mark("build_background")
+
+            if (full_redraw or overlay != shown_overlay
+                    or (overlay and (hud != shown_hud or profiler.enabled))):
+                # Whole frame: background layer, field, panel values and any overlay
+                current_screen.blit(background, (0, 0))
+                profiler.mark("background")
+                self.playfield.invalidate()
+                self.render_playfield(current_screen, grid_x, grid_y)
+                profiler.mark("render_playfield")
+                self.draw_info(current_screen, panel_base_x, panel_base_y) 
+                shown_hud, hud_time = hud, pygame.time.get_ticks()
+                profiler.mark("draw_info")
+
+                if self.paused:
+                    self.draw_pause(current_screen, window_width, window_height)
+                    profiler.mark("draw_pause")
+                elif self.game_over:
+                    self.draw_game_over(current_screen, window_width, window_height)
+                    profiler.mark("draw_game_over")
+
+                profiler.erase_rect()
+                profiler.draw(current_screen, profiler_x, profiler_y)
+                profiler.mark("profiler")
+                governor.present()
+                profiler.mark("display")
+                full_redraw = False
+            elif not overlay:
+                # Only the changed cells, plus the panel if its contents changed
+                stale = profiler.erase_rect()
+                if stale:
+                    self.playfield.invalidate_rect(stale)
+                dirty_rects = self.render_playfield(current_screen, grid_x, grid_y)
+                profiler.mark("render_playfield")
+                if hud != shown_hud and pygame.time.get_ticks() - hud_time >= governor.hud_interval_ms:
+                    current_screen.blit(background, panel_rect, panel_rect)
+                    self.draw_info(current_screen, panel_base_x, panel_base_y)
+                    dirty_rects.append(panel_rect)
+                    shown_hud, hud_time = hud, pygame.time.get_ticks()
+                    profiler.mark("draw_info")
+                profiler_rect = profiler.draw(current_screen, profiler_x, profiler_y)
+                if profiler_rect:
+                    dirty_rects.append(profiler_rect)
+                    profiler.mark("profiler")
+                if dirty_rects:
+                    governor.present(dirty_rects)
+                    profiler.mark("display")
+
+            shown_overlay = overlay
+            profiler.end_frame()
 
 def single_player_mode():
     pygame.init()
     if not pygame.mixer.get_init(): # Initialize mixer only if not already initialized
         pygame.mixer.init()
 
-    controller = None
-    pygame.joystick.init()
-    if pygame.joystick.get_count() > 0:
-        try:
-            controller = pygame.joystick.Joystick(0)
-            controller.init()
-        except pygame.error:
-            print("Could not initialize controller.")
-            controller = None
-            
     # Create a dummy screen initially, SinglePlayerGame.run will set the correct one
-    screen = pygame.display.set_mode((800, 650)) # Adjusted initial height slightly
+    screen = governor.set_mode((800, 650)) # Adjusted initial height slightly
     
-    game = SinglePlayerGame(controller)
+    game = SinglePlayerGame()
     game.run(screen)
\ No newline at end of file
@@ -0,0 +1,75 @@
+# test_pacing.py - FrameGovernor quality adaptation, driven by a fake clock
+
+import pygame
+import pytest
+
+from pacing import FrameGovernor, QUALITY_HIGH, QUALITY_LOW
+
+
+class FakeTime:
+    """Seconds for the governor's clock, advanced by hand"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms / 1000
+
+
+class FakeClock:
+    """Stands in for pygame.time.Clock; the frame-cap wait advances the fake time"""
+
+    def __init__(self, time):
+        self.time = time
+        self.last = time.now
+
+    def tick(self, fps=0):
+        if fps:
+            self.time.advance(max(0.0, 1000 / fps - (self.time.now - self.last) * 1000))
+        dt = (self.time.now - self.last) * 1000
+        self.last = self.time.now
+        return dt
+
+
+@pytest.fixture
+def governed(monkeypatch):
+    monkeypatch.setattr(pygame.display, "flip", lambda: None)
+    monkeypatch.setattr(pygame.display, "update", lambda rects: None)
+    time = FakeTime()
+    return FrameGovernor(clock=time), FakeClock(time), time
+
+
+def run_frames(governor, clock, time, frames, work_ms, blocked_ms=0.0):
+    """Frames doing `work_ms` of work whose present() then blocks for `blocked_ms`"""
+    for _ in range(frames):
+        time.advance(work_ms)
+        governor.present()
+        time.advance(blocked_ms)
+        governor.tick(clock)
+
+
+def test_vsync_blocked_frames_keep_quality(governed):
+    governor, clock, time = governed
+    governor.vsync = True
+    # 3 ms of work, then the flip waits out the rest of a 60 Hz refresh
+    run_frames(governor, clock, time, 1000, work_ms=3.0, blocked_ms=1000 / 60 - 3.0)
+    assert governor.quality == QUALITY_HIGH
+    assert governor.average_ms == pytest.approx(3.0, abs=0.1)
+
+
+def test_capped_frames_keep_quality(governed):
+    governor, clock, time = governed
+    run_frames(governor, clock, time, 1000, work_ms=3.0)
+    assert governor.quality == QUALITY_HIGH
+
+
+def test_slow_frames_shed_quality_and_recover(governed):
+    governor, clock, time = governed
+    governor.vsync = True
+    run_frames(governor, clock, time, 200, work_ms=25.0)
+    assert governor.quality == QUALITY_LOW
+    run_frames(governor, clock, time, 1000, work_ms=3.0, blocked_ms=1000 / 60 - 3.0)
+    assert governor.quality == QUALITY_HIGH
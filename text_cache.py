@@ -0,0 +1,59 @@
+# text_cache.py - Cached text rendering for HUDs and menus
+#
+# Font.render rasterizes the whole string every call, yet most labels are
+# the same from frame to frame ("Next:", the controls list) or change a few
+# times a second at most (score, timer). render_text keeps the rendered
+# surfaces in a bounded LRU cache keyed on (font, text, color, antialias),
+# and get_font reuses SysFont objects instead of loading them in draw calls.
+#
+# Cached surfaces are shared: blit them, never draw on them.
+
+from collections import OrderedDict
+from functools import lru_cache
+
+import pygame
+
+# Rendered strings kept before the least recently used one is dropped
+TEXT_CACHE_SIZE = 256
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces"""
+
+    def __init__(self, maxsize=TEXT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+# Shared by every screen
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Font.render(text, antialias, color), served from the shared cache"""
+    return text_cache.render(font, text, color, antialias)
+
+
+@lru_cache(maxsize=None)
+def get_font(name, size, bold=False, italic=False):
+    """pygame.font.SysFont, created once per (name, size, bold, italic)"""
+    return pygame.font.SysFont(name, size, bold=bold, italic=italic)
@@ -0,0 +1,63 @@
+# tiles.py - Pre-rendered cell tiles
+#
+# Every board, block and preview cell is one of a handful of looks (a color,
+# a size, maybe an outline), so each look is rasterized once into a small
+# Surface and cached. Renderers then collect (tile, position) pairs for a
+# frame and hand them to Surface.blits() in one call instead of issuing a
+# pygame.draw.rect per cell.
+
+from functools import lru_cache
+
+import pygame
+
+
+def _finish(tile, alpha=False):
+    """Match the display's pixel format once it exists, for faster blits"""
+    if pygame.display.get_surface() is None:
+        return tile
+    return tile.convert_alpha() if alpha else tile.convert()
+
+
+def _shade(color, amount):
+    return tuple(max(0, min(255, channel + amount)) for channel in color[:3])
+
+
+@lru_cache(maxsize=None)
+def cell_tile(color, size, outline=None, bevel=False):
+    """
+    A `size` x `size` square of `color`, with an optional 1px `outline` color.
+    `bevel` shades its edges (lighter top/left, darker bottom/right).
+    """
+    tile = pygame.Surface((size, size))
+    tile.fill(color)
+    if bevel and size >= 4:
+        light = _shade(color, 70)
+        dark = _shade(color, -70)
+        pygame.draw.line(tile, light, (0, 0), (size - 1, 0))
+        pygame.draw.line(tile, light, (0, 0), (0, size - 1))
+        pygame.draw.line(tile, dark, (0, size - 1), (size - 1, size - 1))
+        pygame.draw.line(tile, dark, (size - 1, 0), (size - 1, size - 1))
+    if outline is not None:
+        pygame.draw.rect(tile, outline, tile.get_rect(), 1)
+    return _finish(tile)
+
+
+@lru_cache(maxsize=None)
+def outline_tile(color, size):
+    """A transparent `size` x `size` tile with a 1px `color` outline (ghost pieces)"""
+    tile = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.rect(tile, color, tile.get_rect(), 1)
+    return _finish(tile, alpha=True)
+
+
+def draw_cells(surface, cells):
+    """Blit a sequence of (tile, (x, y)) pairs in one batch"""
+    surface.blits(cells, doreturn=False)
+
+
+@lru_cache(maxsize=None)
+def particle_sprite(color, radius, alpha):
+    """A translucent filled circle of `radius` in `color` at `alpha` (menu particles)"""
+    sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+    return _finish(sprite, alpha=True)
@@ -0,0 +1,63 @@
+# timestep.py - Fixed-timestep simulation clock
+#
+# The game loops render once per frame but advance the rules in fixed steps
+# of STEP_MS, as many as the elapsed time calls for. A frame hitch then runs
+# several steps in one frame instead of changing how the game plays, and the
+# clock is injectable, so headless runs can drive a ManualClock as fast as
+# the CPU allows.
+
+import time
+
+# Simulation step in ms (divides every LEVEL_SPEED, so gravity stays exact)
+STEP_MS = 10
+
+# Most steps run in one frame; the rest carry over to the next frames
+MAX_STEPS_PER_FRAME = 25
+
+
+def monotonic_ms():
+    """Default clock: milliseconds from a monotonic timer"""
+    return int(time.monotonic() * 1000)
+
+
+class ManualClock:
+    """A clock that only moves when told to (for headless runs and tests)"""
+
+    def __init__(self, start_ms=0):
+        self.now = start_ms
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms
+
+
+class FixedTimestep:
+    """
+    Accumulates clock time and hands it out as whole simulation steps.
+
+    Call `steps()` once per frame and run that many `step_ms` updates. Time
+    left over is kept for the next frame, so the total number of steps only
+    depends on the time that passed, not on how it was split into frames.
+    """
+
+    def __init__(self, step_ms=STEP_MS, clock=None, max_steps=MAX_STEPS_PER_FRAME):
+        self.step_ms = step_ms
+        self.clock = clock or monotonic_ms
+        self.max_steps = max_steps
+        self.reset()
+
+    def reset(self):
+        """Restart from the clock's current time with nothing accumulated"""
+        self.last_time = self.clock()
+        self.accumulator = 0
+
+    def steps(self):
+        """Number of simulation steps due since the previous call"""
+        now = self.clock()
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        count = min(self.accumulator // self.step_ms, self.max_steps)
+        self.accumulator -= count * self.step_ms
+        return count